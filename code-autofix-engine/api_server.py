@@ -16,11 +16,17 @@ and are importable in the project:
  - config.settings.MAX_ITERATIONS
 """
 
+from contextlib import asynccontextmanager
+from functools import partial
+
+import anyio.to_thread
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, Any, Dict
-import json
 import logging
+import mmap
 import os
 
 from runtime.sandbox_runner import run_in_sandbox
@@ -33,14 +39,26 @@ from fastapi.middleware.cors import CORSMiddleware
 logger = logging.getLogger("api_server")
 logger.setLevel(logging.INFO)
 
-app = FastAPI(title="Local Code Auto-Fix Engine (Python-only API)", version="1.0.0")
+# Blocking work (sandbox runs, repair loops) is offloaded to the AnyIO threadpool;
+# raise its default cap of 40 so long repair loops don't starve /run requests.
+THREADPOOL_TOKENS = 100
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+    yield
+
 
+app = FastAPI(title="Local Code Auto-Fix Engine (Python-only API)", version="1.0.0", lifespan=lifespan)
+
+# Only what the frontend actually sends: JSON POSTs (plus their preflight).
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:8080"],
+    allow_origins=("http://localhost:8080",),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "OPTIONS"),
+    allow_headers=("Content-Type", "Authorization"),
 )
 
 # -------------------------
@@ -75,14 +93,17 @@ class RepairResponse(BaseModel):
 # Utility
 # -------------------------
 def _load_json_report(path: str) -> Optional[Dict[str, Any]]:
+    """Blocking report loader; call via anyio.to_thread from async endpoints."""
     if not path:
         return None
     try:
         if not os.path.exists(path):
-            logger.warning("Report path does not exist: %s", path)
+            logger.debug("Report path does not exist: %s", path)
             return None
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        # mmap + orjson: parse the raw bytes in C without an intermediate str copy
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buf:
+                return orjson.loads(buf)
     except Exception as e:
         logger.exception("Failed to load report JSON: %s", e)
         return None
@@ -92,7 +113,7 @@ def _load_json_report(path: str) -> Optional[Dict[str, Any]]:
 # Endpoints
 # -------------------------
 @app.post("/run", response_model=RunResponse)
-def run_once(payload: RunRequest):
+async def run_once(payload: RunRequest):
     """
     Execute the provided Python code once in the sandbox and return stdout/stderr
     along with a parsed error classification.
@@ -105,13 +126,13 @@ def run_once(payload: RunRequest):
     log_step("Executing sandbox run")
 
     try:
-        stdout, stderr = run_in_sandbox(code)
+        stdout, stderr = await anyio.to_thread.run_sync(run_in_sandbox, code)
     except Exception as e:
         logger.exception("Sandbox execution failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Sandbox execution failed: {e}")
 
     try:
-        error_type, full_err = parse_error(stderr, code)
+        error_type, full_err = await anyio.to_thread.run_sync(parse_error, stderr, code)
     except Exception as e:
         logger.exception("Error parsing failed: %s", e)
         # fallback: return raw stderr with UNKNOWN
@@ -125,8 +146,10 @@ def run_once(payload: RunRequest):
     )
 
 
-@app.post("/repair", response_model=RepairResponse)
-def repair(payload: RepairRequest):
+# RepairResponse documents the schema only: the endpoint returns an ORJSONResponse
+# directly, so the (potentially large) raw_report skips Pydantic validation.
+@app.post("/repair", response_model=RepairResponse, response_class=ORJSONResponse)
+async def repair(payload: RepairRequest):
     """
     Run the full repair loop over the provided Python code using the user prompt.
     Returns the final code, path to saved report, parsed top-level error and changes.
@@ -144,13 +167,15 @@ def repair(payload: RepairRequest):
     log_step("Starting repair loop")
 
     try:
-        final_code, report_path = run_repair_loop(original_code=code, user_prompt=prompt, max_iterations=max_iter)
+        final_code, report_path = await anyio.to_thread.run_sync(
+            partial(run_repair_loop, original_code=code, user_prompt=prompt, max_iterations=max_iter)
+        )
     except Exception as e:
         logger.exception("Repair loop failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Repair loop failed: {e}")
 
     # Try to load the iteration report JSON if available to extract changes and top errors
-    report_json = _load_json_report(report_path) if report_path else None
+    report_json = await anyio.to_thread.run_sync(_load_json_report, report_path) if report_path else None
 
     # Attempt to summarize the last iteration's error info in a friendly structure
     parsed_error = None
@@ -179,20 +204,29 @@ def repair(payload: RepairRequest):
         except Exception as e:
             logger.exception("Failed to extract report summary: %s", e)
 
-    return RepairResponse(
-        final_code=final_code,
-        report_path=report_path,
-        parsed_error=parsed_error,
-        changes=changes,
-        raw_report=report_json,
-    )
+    return ORJSONResponse({
+        "final_code": final_code,
+        "report_path": report_path,
+        "parsed_error": parsed_error,
+        "changes": changes,
+        "raw_report": report_json,
+    })
 
 
 # -------------------------
 # Run server
 # -------------------------
 if __name__ == "__main__":
+    import sys
     import uvicorn
 
     # Note: set host/port as needed. Do not use --reload in production.
-    uvicorn.run("api_server:app", host="127.0.0.1", port=8000, log_level="info")
+    # uvloop has no Windows build; fall back to the stdlib asyncio loop there.
+    uvicorn.run(
+        "api_server:app",
+        host="127.0.0.1",
+        port=8000,
+        log_level="info",
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
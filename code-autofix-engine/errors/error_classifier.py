@@ -1,8 +1,17 @@
 # errors/error_classifier.py
 from errors.error_types import ErrorType
+from errors.error_parser import parse_error
+
+
+class FixMethod:
+    """Fix strategies; plain strings like ErrorType, so reports serialize them as-is."""
+    NONE = "NONE"
+    AST = "AST"
+    LLM = "LLM"
+
 
 # AST-first categories (fast deterministic fixes)
-AST_FIRST = {
+AST_FIRST = frozenset({
     ErrorType.SYNTAX,
     ErrorType.NAME,
     ErrorType.IMPORT,
@@ -13,10 +22,10 @@ AST_FIRST = {
     ErrorType.PARSE,
     ErrorType.REGEX,
     ErrorType.ENCODING,
-}
+})
 
 # LLM-first / require reasoning
-LLM_FIRST = {
+LLM_FIRST = frozenset({
     ErrorType.LOGICAL,
     ErrorType.RECURSION,
     ErrorType.RUNTIME,
@@ -25,22 +34,21 @@ LLM_FIRST = {
     ErrorType.NETWORK,
     ErrorType.SYSTEM,
     ErrorType.MEMORY,
-}
+})
 
 def choose_fix_method(error_type: str) -> str:
     """Return 'AST' or 'LLM' depending on error_type."""
     if error_type in AST_FIRST:
-        return "AST"
+        return FixMethod.AST
     if error_type in LLM_FIRST:
-        return "LLM"
+        return FixMethod.LLM
     # default to LLM for tricky or unknown
-    return "LLM"
+    return FixMethod.LLM
 
 # compatibility: some callers used classify_error(stdout, stderr)
 def classify_error(stdout: str, stderr: str, code: str = "") -> str:
     """
     Backwards-compatible wrapper: run parse_error logic via error_parser.
     """
-    from errors.error_parser import parse_error
     err, _ = parse_error(stderr, code)
     return err
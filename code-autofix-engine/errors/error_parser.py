@@ -1,4 +1,3 @@
-# errors/error_parser.py
 """
 Multi-Language Error Parser: Python, JavaScript, Java
 """
@@ -7,6 +6,61 @@ import re
 from errors.error_types import ErrorType
 
 
+# Marker -> ErrorType tables, in priority order (first marker present wins).
+# Keys are lowercase; the compiled alternations below match them case-sensitively
+# unless wrapped in (?i:...), mirroring the original substring checks.
+_PY_MARKERS = {
+    "syntaxerror": ErrorType.SYNTAX,
+    "nameerror": ErrorType.NAME,
+    "indexerror": ErrorType.INDEX,
+    "keyerror": ErrorType.KEY,
+    "attributeerror": ErrorType.ATTRIBUTE,
+    "zerodivisionerror": ErrorType.ZERO_DIVISION,
+    "recursionerror": ErrorType.RECURSION,
+    "traceback": ErrorType.RUNTIME,
+}
+_PY_RE = re.compile(
+    r"SyntaxError|NameError|IndexError|KeyError|AttributeError"
+    r"|ZeroDivisionError|RecursionError|Traceback"
+)
+
+_JS_MARKERS = {
+    "syntaxerror": ErrorType.SYNTAX,
+    "referenceerror": ErrorType.NAME,
+    "typeerror": ErrorType.TYPE,
+    "rangeerror": ErrorType.INDEX,
+    "unexpected token": ErrorType.SYNTAX,
+    "is not defined": ErrorType.NAME,
+}
+_JS_RE = re.compile(
+    r"SyntaxError|ReferenceError|TypeError|RangeError"
+    r"|(?i:unexpected token)|(?i:is not defined)"
+)
+
+_JAVA_MARKERS = {
+    "error:": ErrorType.SYNTAX,
+    "nullpointerexception": ErrorType.ATTRIBUTE,
+    "arrayindexoutofboundsexception": ErrorType.INDEX,
+    "cannot find symbol": ErrorType.NAME,
+    "exception in thread": ErrorType.RUNTIME,
+}
+_JAVA_RE = re.compile(
+    r"error:|NullPointerException|ArrayIndexOutOfBoundsException"
+    r"|cannot find symbol|Exception in thread"
+)
+
+
+def _classify(text: str, pattern: "re.Pattern", markers: dict):
+    """Scan `text` once and return the highest-priority ErrorType found, or None."""
+    found = {m.lower() for m in pattern.findall(text)}
+    if not found:
+        return None
+    for marker, err in markers.items():
+        if marker in found:
+            return err
+    return None
+
+
 def parse_error(stderr: str, code: str = "", language: str = "python"):
     language = (language or "python").lower()
     text = stderr or ""
@@ -16,24 +70,7 @@ def parse_error(stderr: str, code: str = "", language: str = "python"):
         if not text.strip():
             return ErrorType.NONE, ""
 
-        if "SyntaxError" in text:
-            return ErrorType.SYNTAX, text
-        if "NameError" in text:
-            return ErrorType.NAME, text
-        if "IndexError" in text:
-            return ErrorType.INDEX, text
-        if "KeyError" in text:
-            return ErrorType.KEY, text
-        if "AttributeError" in text:
-            return ErrorType.ATTRIBUTE, text
-        if "ZeroDivisionError" in text:
-            return ErrorType.ZERO_DIVISION, text
-        if "RecursionError" in text:
-            return ErrorType.RECURSION, text
-        if "Traceback" in text:
-            return ErrorType.RUNTIME, text
-
-        return ErrorType.RUNTIME, text
+        return _classify(text, _PY_RE, _PY_MARKERS) or ErrorType.RUNTIME, text
 
 
     # ------------------ JAVASCRIPT ------------------
@@ -41,20 +78,7 @@ def parse_error(stderr: str, code: str = "", language: str = "python"):
         if not text.strip():
             return ErrorType.NONE, ""
 
-        if "SyntaxError" in text:
-            return ErrorType.SYNTAX, text
-        if "ReferenceError" in text:
-            return ErrorType.NAME, text
-        if "TypeError" in text:
-            return ErrorType.TYPE, text
-        if "RangeError" in text:
-            return ErrorType.INDEX, text
-        if "unexpected token" in text.lower():
-            return ErrorType.SYNTAX, text
-        if "is not defined" in text.lower():
-            return ErrorType.NAME, text
-
-        return ErrorType.RUNTIME, text
+        return _classify(text, _JS_RE, _JS_MARKERS) or ErrorType.RUNTIME, text
 
 
     # ------------------ JAVA ------------------
@@ -62,18 +86,7 @@ def parse_error(stderr: str, code: str = "", language: str = "python"):
         if not text.strip():
             return ErrorType.NONE, ""
 
-        if "error:" in text:
-            return ErrorType.SYNTAX, text
-        if "NullPointerException" in text:
-            return ErrorType.ATTRIBUTE, text
-        if "ArrayIndexOutOfBoundsException" in text:
-            return ErrorType.INDEX, text
-        if "cannot find symbol" in text:
-            return ErrorType.NAME, text
-        if "Exception in thread" in text:
-            return ErrorType.RUNTIME, text
-
-        return ErrorType.RUNTIME, text
+        return _classify(text, _JAVA_RE, _JAVA_MARKERS) or ErrorType.RUNTIME, text
 
 
     return ErrorType.RUNTIME, text
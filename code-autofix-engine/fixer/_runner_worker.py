@@ -0,0 +1,91 @@
+# fixer/_runner_worker.py
+"""
+Long-lived test runner used by logical_detector on POSIX.
+
+Pooled by logical_detector (utils/worker_pool.py) and kept alive, so the
+interpreter start-up cost is paid once instead of per inspect_and_test call.
+
+Protocol (one JSON object per line):
+    request  (stdin):  {"code": str, "tests": [test dict, ...], "timeout": float}
+    response (stdout): {"results": [result dict, ...]}  or  {"timeout": true}
+A batch request {"jobs": [{"code": ..., "tests": ...}, ...], "timeout": float}
+is answered with {"batch": [response, ...]}, one per job; the timeout applies
+to each job.
+
+Each request is executed in a forked child with a fresh globals dict and
+stdin/stdout/stderr pointed at /dev/null, so user code can neither corrupt the
+protocol stream nor leak state (monkeypatched builtins, sys tweaks, imports)
+into later requests. The child reports results over a private pipe.
+"""
+
+import os
+import sys
+import traceback
+
+# helpers shared with the worker's client; utils/ goes on the path for this import only
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils"))
+import worker_io  # noqa: E402
+del sys.path[0]
+
+
+def _run_test(fn_call, env):
+    try:
+        # eval the call and stringify result
+        val = eval(fn_call, env)
+        return {"ok": True, "result": repr(val), "error": None}
+    except Exception:
+        return {"ok": False, "result": None, "error": traceback.format_exc()}
+
+
+def _child(code, tests, out_fd):
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    payload = b""
+    try:
+        env = {"__name__": "__main__", "__builtins__": __builtins__}
+        exec(compile(code, "<string>", "exec"), env)
+
+        results = []
+        try:
+            for t in tests:
+                res = _run_test(t["call"], env)
+                results.append({
+                    "call": t["call"], "expected": t["expected"],
+                    "ok": res["ok"], "result": res["result"], "error": res["error"],
+                    "description": t.get("description"),
+                })
+        except Exception as e:
+            results.append({"call": None, "expected": None, "ok": False, "result": None, "error": str(e)})
+        payload = worker_io.dumps(results)
+    except BaseException:
+        # failure before tests (syntax/runtime at import) -> no results, like the one-shot driver
+        payload = b""
+
+    view = memoryview(payload)
+    while view:
+        n = os.write(out_fd, view)
+        view = view[n:]
+    os._exit(0)
+
+
+def _run_request(req) -> bytes:
+    """Run one job in a forked child; returns the encoded response object."""
+    code, tests = req.get("code", ""), req.get("tests", [])
+    out = worker_io.run_forked(lambda w: _child(code, tests, w), 1, float(req.get("timeout", 1.0)))
+    if out is None:
+        return b'{"timeout":true}'
+    # the child already produced JSON: splice it in instead of re-encoding it
+    return b'{"results":' + (out[0] or b"[]") + b"}"
+
+
+def _handle(req) -> bytes:
+    if "jobs" in req:
+        timeout = req.get("timeout", 1.0)
+        return b'{"batch":[' + b",".join(_run_request(dict(job, timeout=timeout)) for job in req["jobs"]) + b"]}"
+    return _run_request(req)
+
+
+if __name__ == "__main__":
+    worker_io.serve(_handle)
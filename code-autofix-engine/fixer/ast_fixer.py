@@ -21,14 +21,42 @@ from __future__ import annotations
 
 import ast
 import builtins
+import functools
 import logging
-import re
-from typing import Dict, Set, Tuple
+from typing import Dict, List, Set, Tuple
 
+from errors.error_types import ErrorType
 from fixer.ast_rules import FUNC_TO_MODULE, PREFERRED_MODULES
+from utils.regex_engine import compile_pattern
 
 logger = logging.getLogger(__name__)
 
+# Hot-path patterns, compiled once (RE2 when available and the pattern allows;
+# the \w/\s ones stay on re so non-ASCII names are handled the same either way).
+_LIST_TOKEN_RE = compile_pattern(r"[\w\(\)\+\-\*/]+")
+# trailing newline captured explicitly: RE2's "$" does not match before a final "\n"
+_INCOMPLETE_CALL_RE = compile_pattern(r"(\w+)\((\n?)$")
+_BROKEN_ASSIGN_RE = compile_pattern(r"(\w+)\s*=\s*$")
+_TRAILING_OP_RE = compile_pattern(r"([+\-*/%]|and|or|==|!=)\s*$")
+_TRAILING_OP_CHARS = ("+", "-", "*", "/", "%")
+_TRAILING_OP_TOKENS = _TRAILING_OP_CHARS + ("and", "or", "==", "!=")
+_EMPTY_ITEM_RE = compile_pattern(r",\s*,")
+_BRACKET_CHAR_RE = compile_pattern(r"[()\[\]{}]")
+_NON_BRACKET_RE = compile_pattern(r"[^()\[\]{}]+")
+_BALANCE_MAX_ROUNDS = 32
+
+_OPEN_TO_CLOSE = {"(": ")", "[": "]", "{": "}"}
+
+_BUILTINS = frozenset(dir(builtins))
+
+# error types where the text itself is broken and the syntax stages must run
+_SYNTAX_ERROR_TYPES = frozenset({ErrorType.SYNTAX, ErrorType.PARSE})
+
+# name -> candidate modules, resolved once instead of per lookup
+_MODULE_CANDIDATES = {
+    name: PREFERRED_MODULES.get(name, (mod,)) for name, mod in FUNC_TO_MODULE.items()
+}
+
 
 # =============================================================================
 #  PRIMARY ENTRYPOINT
@@ -42,16 +70,29 @@ def try_ast_fix(error_type: str, code: str) -> str:
     1. Try fast syntax fixes (brackets, quotes, colons, indentation, commas).
     2. Try aggressive AST healing.
     3. Then run semantic (import/name) fixes.
+
+    Every stage is a pure function of (error_type, code), so results are
+    memoized: the repair loop often resubmits code it has already seen.
     """
+    return _try_ast_fix_cached(error_type, code)
+
 
+@functools.lru_cache(maxsize=256)
+def _try_ast_fix_cached(error_type: str, code: str) -> str:
     original = code
 
+    # -----------------------------
+    # ALREADY VALID: semantic errors only need the import/name stage
+    # -----------------------------
+    if error_type not in _SYNTAX_ERROR_TYPES:
+        parsed = _parse_cached(code)
+        if parsed:
+            return fix_imports_and_names(code, parsed)
+
     # -----------------------------
     # SYNTAX FIXES FIRST
     # -----------------------------
-    code = fix_unclosed_brackets(code)
-    code = fix_backward_bracket_mismatch(code)
-    code = fix_unclosed_strings(code)
+    code = fix_brackets_and_quotes(code)
     code = fix_missing_colons_and_indent(code)
     code = fix_missing_commas(code)
     code = fix_incomplete_calls(code)
@@ -59,7 +100,7 @@ def try_ast_fix(error_type: str, code: str) -> str:
     code = fix_trailing_operators(code)
 
     # Try parsing
-    parsed = safe_parse(code)
+    parsed = _parse_cached(code)
     if parsed:
         logger.info("AST-V2: Syntax healed before semantic stage.")
         return fix_imports_and_names(code, parsed)
@@ -67,8 +108,10 @@ def try_ast_fix(error_type: str, code: str) -> str:
     # -----------------------------
     # AGGRESSIVE SYNTAX HEALER
     # -----------------------------
-    code = heal_broken_expressions(code)
-    parsed = safe_parse(code)
+    healed = heal_broken_expressions(code)
+    # unchanged text would only fail to parse again
+    parsed = _parse_cached(healed) if healed != code else None
+    code = healed
 
     if parsed:
         logger.info("AST-V2: Aggressive healing succeeded.")
@@ -95,6 +138,16 @@ def safe_parse(code: str):
         return None
 
 
+@functools.lru_cache(maxsize=32)
+def _parse_cached(code: str):
+    """
+    safe_parse memoized on the source text: the repair loop re-submits the same
+    (or already-healed) code across iterations.
+    The returned tree is shared between callers — treat it as read-only.
+    """
+    return safe_parse(code)
+
+
 # =============================================================================
 #  BASIC SYNTAX HEALING
 # =============================================================================
@@ -104,6 +157,9 @@ def fix_unclosed_brackets(code: str) -> str:
     Add missing ')]}' to fix bracket mismatches.
     Handles nested stacks and mixed bracket usage.
     """
+    if _brackets_balanced(code):
+        return code
+
     stack = []
     BR = {"(": ")", "[": "]", "{": "}"}
 
@@ -120,6 +176,71 @@ def fix_unclosed_brackets(code: str) -> str:
     return code
 
 
+def _brackets_balanced(code: str) -> bool:
+    """
+    Bulk check that every bracket is matched and properly nested, without a
+    per-character Python loop: strip non-bracket text, then peel innermost
+    "()", "[]", "{}" pairs with str.replace until nothing is left.
+    Gives up (returns False) after _BALANCE_MAX_ROUNDS nesting levels so the
+    caller falls back to its exact stack scan.
+    """
+    seq = _NON_BRACKET_RE.sub("", code)
+    for _ in range(_BALANCE_MAX_ROUNDS):
+        if not seq:
+            return True
+        peeled = seq.replace("()", "").replace("[]", "").replace("{}", "")
+        if len(peeled) == len(seq):
+            return False
+        seq = peeled
+    return not seq
+
+
+def _rebalance_brackets(code: str) -> str:
+    """Drop unmatched closers and append closers for brackets left open."""
+    stack = []
+    parts = []
+    last = 0
+
+    for m in _BRACKET_CHAR_RE.finditer(code):
+        ch = m.group()
+        closer = _OPEN_TO_CLOSE.get(ch)
+        if closer:
+            stack.append(closer)
+        elif stack and stack[-1] == ch:
+            stack.pop()
+        else:
+            # unmatched closer: cut it out
+            i = m.start()
+            parts.append(code[last:i])
+            last = i + 1
+
+    if parts:
+        parts.append(code[last:])
+        code = "".join(parts)
+
+    if stack:
+        code += "".join(reversed(stack))
+    return code
+
+
+def fix_brackets_and_quotes(code: str) -> str:
+    """
+    Single-pass equivalent of fix_unclosed_brackets -> fix_backward_bracket_mismatch
+    -> fix_unclosed_strings:
+    - drops closers that don't match the innermost open bracket
+    - appends closers for brackets still open at EOF
+    - appends a quote for each quote kind with an odd count
+    Only bracket characters are visited (regex scan), everything else is sliced through.
+    """
+    if not _brackets_balanced(code):
+        code = _rebalance_brackets(code)
+    if code.count('"') % 2 == 1:
+        code += '"'
+    if code.count("'") % 2 == 1:
+        code += "'"
+    return code
+
+
 def fix_unclosed_strings(code: str) -> str:
     """
     Fix unbalanced quotes.
@@ -160,11 +281,43 @@ def fix_missing_commas(code: str) -> str:
     Fix missing commas inside lists, tuples, dicts:
         [1 2 3] → [1, 2, 3]
     """
-    def patch(m):
-        return m.group(0).replace(" ", ", ")
+    regions = _find_bracket_regions(code)
+    if not regions:
+        return code
 
     # Only patch inside bracket expressions
-    return re.sub(r"\[(.*?)\]", lambda m: fix_list(m.group()), code)
+    parts = []
+    last = 0
+    for start, end in regions:
+        parts.append(code[last:start])
+        parts.append(fix_list(code[start:end + 1]))
+        last = end + 1
+    parts.append(code[last:])
+    return "".join(parts)
+
+
+def _find_bracket_regions(code: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of each "[" ... first following "]" on the same line,
+    scanning left to right without overlap (same spans as r"\[(.*?)\]").
+    """
+    regions = []
+    pos = 0
+    while True:
+        start = code.find("[", pos)
+        if start < 0:
+            break
+        end = code.find("]", start + 1)
+        if end < 0:
+            break
+        nl = code.find("\n", start + 1, end)
+        if nl >= 0:
+            # any "[" before this newline would hit it too
+            pos = nl + 1
+            continue
+        regions.append((start, end))
+        pos = end + 1
+    return regions
 
 
 def fix_list(text: str) -> str:
@@ -172,10 +325,13 @@ def fix_list(text: str) -> str:
     Repairs inside "[ ... ]"
     """
     inner = text[1:-1]
-    tokens = re.split(r"\s+", inner)
+    # an empty item (blank list, leading/trailing space) never looks like a literal
+    if not inner or inner[0].isspace() or inner[-1].isspace():
+        return text
+    tokens = inner.split()
 
     # If items look like literals, add commas
-    if all(re.match(r"^[\w\(\)\+\-\*/]+$", t) for t in tokens):
+    if all(_LIST_TOKEN_RE.fullmatch(t) for t in tokens):
         return "[" + ", ".join(tokens) + "]"
     return text
 
@@ -185,7 +341,10 @@ def fix_incomplete_calls(code: str) -> str:
     Fix incomplete calls:
         print(  → print()
     """
-    return re.sub(r"(\w+)\($", r"\1()", code)
+    # the pattern is end-anchored: skip the full-text regex scan unless the tail can match
+    if not code.endswith(("(", "(\n")):
+        return code
+    return _INCOMPLETE_CALL_RE.sub(r"\1()\2", code)
 
 
 def fix_broken_assignments(code: str) -> str:
@@ -193,14 +352,18 @@ def fix_broken_assignments(code: str) -> str:
     Fix broken assignments like:
         x =
     """
-    return re.sub(r"(\w+)\s*=\s*$", r"\1 = None", code)
+    if not code.rstrip().endswith("="):
+        return code
+    return _BROKEN_ASSIGN_RE.sub(r"\1 = None", code)
 
 
 def fix_trailing_operators(code: str) -> str:
     """
     Remove trailing operators: "1 +", "a *", "value and"
     """
-    return re.sub(r"([+\-*/%]|and|or|==|!=)\s*$", "", code)
+    if not code.rstrip().endswith(_TRAILING_OP_TOKENS):
+        return code
+    return _TRAILING_OP_RE.sub("", code)
 
 
 # =============================================================================
@@ -221,11 +384,12 @@ def heal_broken_expressions(code: str) -> str:
         s = line.strip()
 
         # (1) Join lines ending with operator
-        if re.search(r"[+\-*/%]$", s):
+        if s.endswith(_TRAILING_OP_CHARS):
             line = line.rstrip(" +*/%-") + " 0"
 
-        # (2) Fix empty list item like: [1, , 2]
-        line = re.sub(r",\s*,", ", None,", line)
+        # (2) Fix empty list item like: [1, , 2] (needs at least two commas)
+        if line.count(",") > 1:
+            line = _EMPTY_ITEM_RE.sub(", None,", line)
 
         # (3) Fix lone '('
         if s.endswith("("):
@@ -248,8 +412,10 @@ def fix_imports_and_names(code: str, tree: ast.AST) -> str:
     - from-import insertion
     - AST unparse
     """
-    imported_modules, from_imports, defined_names = extract_defined(tree)
-    used = collect_unresolved(tree, defined_names)
+    collector = DefUseCollector()
+    collector.visit(tree)
+    imported_modules, from_imports = collector.imported_modules, collector.from_imports
+    used = collector.unresolved
 
     add_imports = []
     prefix_map = {}
@@ -258,7 +424,7 @@ def fix_imports_and_names(code: str, tree: ast.AST) -> str:
         # not a builtin? try module mapping
         if name in FUNC_TO_MODULE:
 
-            modules = PREFERRED_MODULES.get(name, [FUNC_TO_MODULE[name]])
+            modules = _MODULE_CANDIDATES[name]
             chosen = choose_best_module(modules, imported_modules, from_imports)
 
             if chosen in imported_modules:
@@ -266,14 +432,11 @@ def fix_imports_and_names(code: str, tree: ast.AST) -> str:
             else:
                 add_imports.append(f"from {chosen} import {name}")
 
-    # Apply prefixing (math.sqrt)
+    # Apply prefixing (math.sqrt) as targeted text edits; keeps the user's formatting
     if prefix_map:
-        tree = Prefixer(prefix_map).visit(tree)
-        tree = ast.fix_missing_locations(tree)
-        try:
-            code = ast.unparse(tree)
-        except Exception:
-            pass
+        prefixer = Prefixer(prefix_map)
+        prefixer.visit(tree)
+        code = prefixer.apply(code)
 
     # Insert missing imports
     if add_imports:
@@ -286,6 +449,9 @@ def fix_backward_bracket_mismatch(code: str) -> str:
     Ensures that extra closers ( ] ) } ) added by SSR or user mistakes
     do not break parsing. Removes unmatched closers.
     """
+    if _brackets_balanced(code):
+        return code
+
     stack = []
     result = []
 
@@ -309,46 +475,68 @@ def fix_backward_bracket_mismatch(code: str) -> str:
     return "".join(result)
 
 
-def extract_defined(tree: ast.AST):
-    imported_modules = set()
-    from_imports = {}
-    defined = set(dir(builtins))
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for a in node.names:
-                mod = a.name.split(".")[0]
-                imported_modules.add(mod)
-                defined.add(a.asname or mod)
-
-        elif isinstance(node, ast.ImportFrom):
-            mod = node.module.split(".")[0]
-            imported_modules.add(mod)
-            for a in node.names:
-                from_imports.setdefault(mod, set()).add(a.name)
-                defined.add(a.asname or a.name)
+class DefUseCollector(ast.NodeVisitor):
+    """
+    One traversal that records both what the module defines/imports and which
+    names it loads. Unresolved names are `loaded - defined` once the walk is done.
+    """
 
-        elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-            defined.add(node.name)
+    def __init__(self):
+        self.imported_modules = set()
+        self.from_imports = {}
+        self.defined = set(_BUILTINS)
+        self.loaded = set()
+
+    @property
+    def unresolved(self) -> Set[str]:
+        return self.loaded - self.defined
+
+    def visit_Import(self, node):
+        for a in node.names:
+            mod = a.name.split(".")[0]
+            self.imported_modules.add(mod)
+            self.defined.add(a.asname or mod)
+
+    def visit_ImportFrom(self, node):
+        mod = node.module.split(".")[0] if node.module else ""
+        if mod:
+            self.imported_modules.add(mod)
+        for a in node.names:
+            if mod:
+                self.from_imports.setdefault(mod, set()).add(a.name)
+            self.defined.add(a.asname or a.name)
+
+    def visit_FunctionDef(self, node):
+        self.defined.add(node.name)
+        self.generic_visit(node)
+
+    visit_ClassDef = visit_FunctionDef
+
+    def visit_arg(self, node):
+        self.defined.add(node.arg)
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        for t in node.targets:
+            if type(t) is ast.Name:
+                self.defined.add(t.id)
+        self.generic_visit(node)
 
-        elif isinstance(node, ast.arg):
-            defined.add(node.arg)
+    def visit_Name(self, node):
+        if type(node.ctx) is ast.Load:
+            self.loaded.add(node.id)
 
-        elif isinstance(node, ast.Assign):
-            for t in node.targets:
-                if isinstance(t, ast.Name):
-                    defined.add(t.id)
 
-    return imported_modules, from_imports, defined
+def extract_defined(tree: ast.AST):
+    c = DefUseCollector()
+    c.visit(tree)
+    return c.imported_modules, c.from_imports, c.defined
 
 
 def collect_unresolved(tree: ast.AST, defined: Set[str]):
-    used = set()
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-            if node.id not in defined:
-                used.add(node.id)
-    return used
+    c = DefUseCollector()
+    c.visit(tree)
+    return c.loaded - defined
 
 
 def choose_best_module(candidates, imported_modules, from_imports):
@@ -370,18 +558,29 @@ def insert_imports(code: str, new_imports: list[str]) -> str:
     return "\n".join(lines[:idx] + [new_block] + lines[idx:])
 
 
-class Prefixer(ast.NodeTransformer):
+class Prefixer(ast.NodeVisitor):
+    """
+    Journal `name -> module.name` rewrites instead of transforming the tree:
+    each loaded name in prefix_map records a (lineno, col_offset, module) insertion,
+    and apply() splices "module." into the source at those positions.
+    """
+
     def __init__(self, prefix_map):
         self.prefix_map = prefix_map
+        self.edits = []
 
     def visit_Name(self, node):
-        if isinstance(node.ctx, ast.Load) and node.id in self.prefix_map:
-            return ast.copy_location(
-                ast.Attribute(
-                    value=ast.Name(id=self.prefix_map[node.id], ctx=ast.Load()),
-                    attr=node.id,
-                    ctx=ast.Load()
-                ),
-                node
-            )
-        return node
+        if type(node.ctx) is ast.Load and node.id in self.prefix_map:
+            self.edits.append((node.lineno, node.col_offset, self.prefix_map[node.id]))
+
+    def apply(self, code: str) -> str:
+        if not self.edits:
+            return code
+        # col_offset is a UTF-8 byte offset; bytes.splitlines matches the
+        # tokenizer's line endings (\n, \r\n, \r)
+        lines = code.encode("utf-8").splitlines(keepends=True)
+        # reverse order keeps earlier offsets on the same line valid
+        for lineno, col, module in sorted(self.edits, reverse=True):
+            line = lines[lineno - 1]
+            lines[lineno - 1] = line[:col] + module.encode("utf-8") + b"." + line[col:]
+        return b"".join(lines).decode("utf-8")
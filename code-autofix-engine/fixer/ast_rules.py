@@ -76,28 +76,29 @@ FUNC_TO_MODULE = {
 
 # ------------------------------------------------------------------------------
 #  PREFERRED MODULES (when multiple exist)
+#  Values are tuples: read-only, and shareable with the single-module fallback.
 # ------------------------------------------------------------------------------
 
 PREFERRED_MODULES = {
-    "sqrt": ["math", "numpy"],
-    "sin": ["math", "numpy"],
-    "cos": ["math", "numpy"],
-    "log": ["math", "numpy"],
-    "exp": ["math", "numpy"],
+    "sqrt": ("math", "numpy"),
+    "sin": ("math", "numpy"),
+    "cos": ("math", "numpy"),
+    "log": ("math", "numpy"),
+    "exp": ("math", "numpy"),
 
-    "mean": ["statistics", "numpy"],
-    "median": ["statistics", "numpy"],
-    "mode": ["statistics"],
+    "mean": ("statistics", "numpy"),
+    "median": ("statistics", "numpy"),
+    "mode": ("statistics",),
 
-    "random": ["random", "numpy.random"],
-    "randint": ["random", "numpy.random"],
+    "random": ("random", "numpy.random"),
+    "randint": ("random", "numpy.random"),
 
-    "search": ["re"],
-    "sub": ["re"],
+    "search": ("re",),
+    "sub": ("re",),
 
-    "Path": ["pathlib"],
-    "join": ["os.path", "pathlib"],
+    "Path": ("pathlib",),
+    "join": ("os.path", "pathlib"),
 
-    "array": ["numpy"],
-    "arange": ["numpy"],
+    "array": ("numpy",),
+    "arange": ("numpy",),
 }
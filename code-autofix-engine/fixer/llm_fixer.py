@@ -8,14 +8,22 @@ Returns cleaned Python code (or empty string on failure).
 from __future__ import annotations
 
 import ast
+import functools
 import logging
-import re
 from typing import Optional, List
 
 from models.qwen_runner import qwen_generate
+from utils.regex_engine import compile_pattern
 
 logger = logging.getLogger(__name__)
 
+# Patterns applied to raw LLM output, compiled once (RE2 when available).
+_FENCE_RE = compile_pattern(r"(?si)```(?:python)?\n(.*?)```")
+_LEADING_COMMENTS_RE = compile_pattern(r"^\s*#.*\n+")
+_LEADING_LABEL_RE = compile_pattern(r"^[A-Za-z ,\-\(\)\"']+:\s*")
+_OPEN_FENCE_RE = compile_pattern(r"^```(?:python)?\n?")
+_CLOSE_FENCE_RE = compile_pattern(r"\n?```\n?$")
+
 _PROMPT_TEMPLATE = """You are a local code assistant. The user provided the following code:
 
 ###
@@ -41,7 +49,9 @@ If you cannot safely fix the program, return an empty string.
 """
 
 MAX_OUTPUT_CHARS = 20000
+MAX_TRIM_RETRIES = 8
 
+@functools.lru_cache(maxsize=1024)
 def _is_valid_python(code: str) -> bool:
     try:
         ast.parse(code)
@@ -49,31 +59,53 @@ def _is_valid_python(code: str) -> bool:
     except Exception:
         return False
 
+def _largest_valid_block(lines: List[str]) -> str:
+    """
+    Find a parseable block by trimming the line window around each SyntaxError:
+    an error in the top half drops everything up to and including that line
+    (prose before the code), one in the bottom half drops it and everything after.
+    Bounded by MAX_TRIM_RETRIES parses instead of scanning every sub-range.
+    """
+    lo, hi = 0, len(lines)
+    for _ in range(MAX_TRIM_RETRIES):
+        # skip blank edges so SyntaxError.lineno maps straight onto lines[lo:]
+        while lo < hi and not lines[lo].strip():
+            lo += 1
+        while hi > lo and not lines[hi - 1].strip():
+            hi -= 1
+        block = "\n".join(lines[lo:hi]).strip()
+        if len(block) < 10:
+            return ""
+        try:
+            ast.parse(block)
+            return block
+        except SyntaxError as e:
+            bad = lo + min(max((e.lineno or 1) - 1, 0), hi - lo - 1)
+        except Exception:
+            return ""
+        if bad - lo < (hi - lo) / 2:
+            lo = bad + 1
+        else:
+            hi = bad
+    return ""
+
 def _extract_code_from_text(text: str) -> str:
     if not text:
         return ""
-    fence_match = re.search(r"```(?:python)?\n(.*?)```", text, re.S | re.I)
+    fence_match = _FENCE_RE.search(text)
     if fence_match:
         candidate = fence_match.group(1).strip()
         if _is_valid_python(candidate):
             return candidate + "\n"
-        candidate2 = re.sub(r"^\s*#.*\n+", "", candidate)
+        candidate2 = _LEADING_COMMENTS_RE.sub("", candidate)
         if _is_valid_python(candidate2):
             return candidate2 + "\n"
 
-    lines = text.splitlines()
-    best = ""
-    for i in range(len(lines)):
-        for j in range(i + 1, min(len(lines), i + 200) + 1):
-            block = "\n".join(lines[i:j]).strip()
-            if len(block) < 10:
-                continue
-            if _is_valid_python(block) and len(block) > len(best):
-                best = block
+    best = _largest_valid_block(text.splitlines())
     if best:
         return best + "\n"
 
-    cleaned = re.sub(r"^[A-Za-z ,\-\(\)\"']+:\s*", "", text).strip()
+    cleaned = _LEADING_LABEL_RE.sub("", text).strip()
     if _is_valid_python(cleaned):
         return cleaned + "\n"
 
@@ -83,8 +115,8 @@ def clean_llm_code(text: str) -> str:
     if not text:
         return ""
     text = text.replace("\r\n", "\n")
-    text = re.sub(r"^```(?:python)?\n?", "", text)
-    text = re.sub(r"\n?```$", "", text)
+    text = _OPEN_FENCE_RE.sub("", text)
+    text = _CLOSE_FENCE_RE.sub("", text)
     text = text.strip()
     extracted = _extract_code_from_text(text)
     return extracted if extracted.endswith("\n") else extracted + ("\n" if extracted else "")
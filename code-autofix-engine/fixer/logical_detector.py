@@ -24,11 +24,14 @@ Issue dict fields:
     "hint": str,
     "suggested_patch": { "kind": "text_replace", "pattern": "...", "replacement": "..." } (optional)
 }
+Detectors build these as `Issue` objects internally; public functions return dicts.
 """
 
 from __future__ import annotations
 
 import ast
+import builtins
+import functools
 import subprocess
 import tempfile
 import textwrap
@@ -37,16 +40,51 @@ import json
 import logging
 import os
 import re
-from typing import List, Dict, Optional, Tuple, Any
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from utils.worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# Patterns used on every inspect/analyze/patch call, compiled once.
+_RE_JSON_ARR = re.compile(r"(\[.*\])", re.S)
+_RE_FACT_CALL = re.compile(r".*factorial\(")
+_RE_DEF_FACT = re.compile(r"def\s+factorial\s*\(")
+_RE_FACT_BODY = re.compile(r"(def\s+factorial\s*\(.*?\):)([\s\S]*?)(?=def\s|\Z)")
+_RE_RETURN_0 = re.compile(r"return\s+0\b")
+_RE_FACT_PATCH = re.compile(r"(def\s+factorial\s*\(.*?\):)([\s\S]*?)return\s+0\b")
+_RE_MEMO0 = re.compile(r"memo\[0\]")
+
+# Names SHADOW_BUILTIN reports, computed once. Read from the builtins module:
+# `__builtins__` is a dict in an imported module, and dir() of it lists dict methods.
+_BUILTINS: frozenset = frozenset(vars(builtins))
+
 
 # ---------------------------
 # Utilities
 # ---------------------------
 
+@functools.lru_cache(maxsize=8)
+def _resolve_executable(name: str) -> str:
+    return shutil.which(name) or name
+
+
+def _python_executable() -> str:
+    """
+    PYTHON_EXECUTABLE (default: python) resolved to an absolute path once.
+    A path with a directory plus close_fds=False lets subprocess use
+    os.posix_spawn (vfork-style, no page-table copy) instead of fork+exec.
+    Our own fds are non-inheritable (PEP 446), so close_fds=False leaks nothing.
+    """
+    return _resolve_executable(os.environ.get("PYTHON_EXECUTABLE", "python"))
+
+
 def _safe_run_python(code_snippet: str, timeout: float = 1.0) -> Tuple[str, str, int]:
     """
     Execute small Python snippet in subprocess safely.
@@ -55,8 +93,8 @@ def _safe_run_python(code_snippet: str, timeout: float = 1.0) -> Tuple[str, str,
     """
     try:
         # Use system python executable
-        cmd = [os.environ.get("PYTHON_EXECUTABLE", "python"), "-c", code_snippet]
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        cmd = [_python_executable(), "-c", code_snippet]
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, close_fds=False)
         return proc.stdout, proc.stderr, proc.returncode
     except subprocess.TimeoutExpired:
         return "", "TIMEOUT", -1
@@ -71,40 +109,359 @@ def _ast_parse_safe(code: str) -> Optional[ast.AST]:
         return None
 
 
-def _first_location(node: ast.AST) -> Optional[Tuple[int, int]]:
-    if hasattr(node, "lineno") and hasattr(node, "col_offset"):
-        return (getattr(node, "lineno"), getattr(node, "col_offset"))
-    return None
+# Parsed trees keyed by source text, LRU-evicted. The repair loop re-inspects the
+# same code several times per iteration (before/after patching, validation).
+_AST_CACHE_MAX = 512
+_AST_CACHE: "OrderedDict[str, Optional[ast.AST]]" = OrderedDict()
+
+
+def _ast_parse_cached(code: str) -> Optional[ast.AST]:
+    """
+    Like _ast_parse_safe, but memoized and with `tree.source` already attached.
+    Cached trees are shared: detectors must only read them.
+    """
+    try:
+        tree = _AST_CACHE[code]
+        _AST_CACHE.move_to_end(code)
+        return tree
+    except KeyError:
+        pass
+
+    tree = _ast_parse_safe(code)
+    if tree is not None:
+        setattr(tree, "source", code)
+    _AST_CACHE[code] = tree
+    if len(_AST_CACHE) > _AST_CACHE_MAX:
+        _AST_CACHE.popitem(last=False)
+    return tree
+
+
+def clear_ast_cache() -> None:
+    _AST_CACHE.clear()
+    _generate_tests_cached.cache_clear()
+
+
+class Issue:
+    """
+    A detector finding. Slotted to keep the many per-node findings small; the
+    slots are declared by hand because dataclass(slots=True) needs Python 3.10.
+    """
+
+    __slots__ = ("issue_type", "message", "location", "evidence", "hint", "suggested_patch")
+
+    def __init__(
+        self,
+        issue_type: str,
+        message: str,
+        location: Optional[Tuple[int, int]] = None,
+        evidence: str = "",
+        hint: str = "",
+        suggested_patch: Optional[Dict[str, Any]] = None,
+    ):
+        self.issue_type = issue_type
+        self.message = message
+        self.location = location
+        self.evidence = evidence
+        self.hint = hint
+        self.suggested_patch = suggested_patch
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={value!r}" for name, value in zip(self.__slots__, self._fields()))
+        return f"Issue({args})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        # documented dict shape: suggested_patch only when there is one
+        d = {
+            "issue_type": self.issue_type,
+            "message": self.message,
+            "location": self.location,
+            "evidence": self.evidence,
+            "hint": self.hint,
+        }
+        if self.suggested_patch is not None:
+            d["suggested_patch"] = self.suggested_patch
+        return d
+
+
+def _issue_dicts(issues: List[Any]) -> List[Dict[str, Any]]:
+    return [i.to_dict() if isinstance(i, Issue) else i for i in issues]
+
+
+_LINE_END_RE = re.compile(r"\r\n|\r|\n")
+
+
+def _make_segment_getter(source: str) -> Callable[[ast.AST], Optional[str]]:
+    """
+    ast.get_source_segment without re-splitting `source` on every call: line start
+    offsets are computed once and each segment is a single slice. Columns are
+    UTF-8 byte offsets, so only non-ASCII lines need converting.
+    """
+    starts = [0]
+    starts.extend(m.end() for m in _LINE_END_RE.finditer(source))
+    starts.append(len(source))
+
+    def char_offset(lineno: int, col: int) -> int:
+        begin = starts[lineno - 1]
+        line = source[begin:starts[lineno]]
+        if line.isascii():
+            return begin + col
+        return begin + len(line.encode("utf-8")[:col].decode("utf-8", "replace"))
+
+    def seg(node: ast.AST) -> Optional[str]:
+        try:
+            lineno, end_lineno = node.lineno, node.end_lineno
+            col, end_col = node.col_offset, node.end_col_offset
+        except AttributeError:
+            return None
+        if end_lineno is None or end_col is None or not 0 < lineno <= end_lineno < len(starts):
+            return None
+        return source[char_offset(lineno, col):char_offset(end_lineno, end_col)]
+
+    return seg
+
+
+def _tree_segment_getter(tree: ast.AST, source: Optional[str] = None) -> Callable[[ast.AST], Optional[str]]:
+    """Segment getter memoized on the tree as `tree._seg` (cached trees share it)."""
+    seg = getattr(tree, "_seg", None)
+    if seg is None:
+        seg = _make_segment_getter(getattr(tree, "source", "") if source is None else source)
+        setattr(tree, "_seg", seg)
+    return seg
+
+
+def _first_location(node: Optional[ast.AST]) -> Optional[Tuple[int, int]]:
+    # for nodes that may lack a position (or be None); stmt/expr nodes always have
+    # one, so the per-node checks below read (node.lineno, node.col_offset) directly
+    lineno = getattr(node, "lineno", None)
+    return None if lineno is None else (lineno, node.col_offset)
+
+
+def _iter_nodes(node: ast.AST):
+    """
+    Pre-order (source order) ast.walk replacement: a list stack fed straight from
+    each node's _fields, without ast.walk's deque and iter_child_nodes generator.
+    Yields nodes in the same order as ast.NodeVisitor visits them.
+    """
+    stack = [node]
+    pop, push = stack.pop, stack.append
+    AST = ast.AST
+    while stack:
+        n = pop()
+        yield n
+        for name in reversed(n._fields):
+            v = getattr(n, name, None)
+            if isinstance(v, AST):
+                push(v)
+            elif type(v) is list:
+                for item in reversed(v):
+                    if isinstance(item, AST):
+                        push(item)
 
 
 # ---------------------------
 # Heuristics (static AST)
 # ---------------------------
+# Each heuristic is a per-node check (_*_issues) shared by two drivers:
+#   - the standalone detect_* functions (one _iter_nodes walk each, kept for direct use)
+#   - _UnifiedDetector, which runs every check in a single traversal
+
+def _factorial_base_case_issues(node: ast.FunctionDef, seg: Callable[[ast.AST], Optional[str]]) -> List[Issue]:
+    issues = []
+    if node.name.lower() == "factorial":
+        # search for return const 0
+        for r in _iter_nodes(node):
+            if isinstance(r, ast.Return) and isinstance(r.value, ast.Constant) and r.value.value == 0:
+                loc = (r.lineno, r.col_offset)
+                issues.append(Issue(
+                    issue_type="FACTORIAL_BASE_CASE",
+                    message="factorial() returns 0 for base case; expected 1 for factorial(0).",
+                    location=loc,
+                    evidence=seg(r) or "return 0",
+                    hint="Change base-case return to 1.",
+                    suggested_patch={
+                        "kind": "text_replace",
+                        "pattern": r"return\s+0",
+                        "replacement": "return 1"
+                    }
+                ))
+    return issues
+
+
+def _recursive_no_progress_issues(node: ast.FunctionDef) -> List[Issue]:
+    func_name = node.name
+    # one walk: count calls invoking func_name, stop at the first one that shows
+    # progress (an argument like n-1, n/2 or n//2)
+    recursive_calls = 0
+    for n in _iter_nodes(node):
+        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == func_name:
+            recursive_calls += 1
+            for arg in n.args:
+                if isinstance(arg, ast.BinOp) and isinstance(arg.op, (ast.Sub, ast.Div, ast.FloorDiv)):
+                    return []
+
+    if not recursive_calls:
+        return []
+
+    loc = (node.lineno, node.col_offset)
+    return [Issue(
+        issue_type="RECURSION_NO_PROGRESS",
+        message=f"Function '{func_name}' appears recursive but no obvious progress toward base case detected.",
+        location=loc,
+        evidence=f"recursive calls: {recursive_calls}; no decrement patterns found",
+        hint="Ensure recursive calls modify arguments toward the base case (e.g., n-1).",
+    )]
+
+
+def _mutable_default_issues(node: ast.FunctionDef, seg: Callable[[ast.AST], Optional[str]]) -> List[Issue]:
+    issues = []
+    for arg, default in zip(reversed(node.args.args), reversed(node.args.defaults)):
+        # zip reversed aligns defaults with last args
+        if default is None:
+            continue
+        if isinstance(default, (ast.List, ast.Dict, ast.Set, ast.Call)) or \
+           (isinstance(default, ast.Constant) and isinstance(default.value, (list, dict, set))):
+            loc = (default.lineno, default.col_offset)
+            issues.append(Issue(
+                issue_type="MUTABLE_DEFAULT_ARG",
+                message="Function has mutable default argument which can lead to shared-state bugs.",
+                location=loc,
+                evidence=seg(default) or "mutable default",
+                hint="Use None as default and set inside function body."
+            ))
+    return issues
+
+
+def _is_plus_offset_subscript(node: ast.Subscript) -> bool:
+    # check for BinOp inside slice like a[i+1]
+    return isinstance(node.slice, ast.BinOp) and isinstance(node.slice.op, ast.Add)
+
+
+def _off_by_one_issue(node: ast.Subscript, seg: Callable[[ast.AST], Optional[str]]) -> Issue:
+    return Issue(
+        issue_type="OFF_BY_ONE_INDEX",
+        message="Possible off-by-one index usage (accessing i+1 inside loop over sequence).",
+        location=(node.lineno, node.col_offset),
+        evidence=seg(node) or "subscript with +1",
+        hint="Check loop bounds and whether you might exceed sequence length."
+    )
+
+
+def _literal_length(node: ast.Assign) -> Optional[Tuple[str, int]]:
+    # map variable to literal list length when assignment like arr = [1,2,3]
+    if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+        if isinstance(node.value, (ast.List, ast.Tuple)):
+            return node.targets[0].id, len(node.value.elts)
+    return None
+
+
+def _constant_subscript(node: ast.Subscript) -> Optional[Tuple[str, int]]:
+    if isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, int):
+        if isinstance(node.value, ast.Name):
+            return node.value.id, node.slice.value
+    return None
+
+
+def _index_out_of_range_issue(node: ast.Subscript, name: str, idx: int, ln: int) -> Optional[Issue]:
+    if idx >= ln or idx < -ln:
+        loc = (node.lineno, node.col_offset)
+        return Issue(
+            issue_type="POTENTIAL_INDEX_OUT_OF_RANGE",
+            message=f"Index {idx} on literal '{name}' of length {ln} will be out of range.",
+            location=loc,
+            evidence=f"{name}[{idx}]",
+            hint=f"Use a valid index (< {ln}) or guard access with bounds check."
+        )
+    return None
+
+
+_FLAT_OPERANDS = (ast.Name, ast.Attribute, ast.Constant)
+
+
+def _is_flat_compare(node: ast.AST) -> bool:
+    # a Compare whose operands are plain names/attributes/constants has no nested Compare
+    return (
+        isinstance(node, ast.Compare)
+        and isinstance(node.left, _FLAT_OPERANDS)
+        and all(isinstance(c, _FLAT_OPERANDS) for c in node.comparators)
+    )
+
+
+def _boolean_compare_issues(node: ast.If, seg: Callable[[ast.AST], Optional[str]]) -> List[Issue]:
+    issues = []
+    test = node.test
+    # `if x:` / `if obj.flag:` / `if True:` cannot hold a comparison
+    if isinstance(test, (ast.Name, ast.Attribute, ast.Constant)):
+        return issues
+    # check for Compare node with constant true/false or identity misuse
+    comps = (test,) if _is_flat_compare(test) else (n for n in _iter_nodes(test) if isinstance(n, ast.Compare))
+    for comp in comps:
+        for c in comp.comparators:
+            # True/False are the only bool instances
+            if isinstance(c, ast.Constant) and (c.value is True or c.value is False):
+                loc = (comp.lineno, comp.col_offset)
+                issues.append(Issue(
+                    issue_type="SUSPICIOUS_BOOLEAN_COMPARE",
+                    message="Suspicious boolean comparison (comparison to True/False).",
+                    location=loc,
+                    evidence=seg(comp) or "compare to bool",
+                    hint="Prefer direct truthiness checks (if x:) or use '==' only when intended."
+                ))
+    return issues
+
+
+def _shadow_builtin_issues(node: ast.Assign) -> List[Issue]:
+    issues = []
+    for t in node.targets:
+        if isinstance(t, ast.Name) and t.id in _BUILTINS:
+            loc = (t.lineno, t.col_offset)
+            issues.append(Issue(
+                issue_type="SHADOW_BUILTIN",
+                message=f"Assignment shadows builtin '{t.id}'.",
+                location=loc,
+                evidence=t.id,
+                hint="Rename variable to avoid shadowing builtins."
+            ))
+    return issues
+
+
+def _unreachable_code_issues(node: ast.FunctionDef, seg: Callable[[ast.AST], Optional[str]]) -> List[Issue]:
+    issues = []
+    body = node.body
+    for i, stmt in enumerate(body[:-1]):
+        if isinstance(stmt, ast.Return):
+            # anything after a return in the same block is unreachable
+            next_stmt = body[i + 1]
+            loc = (next_stmt.lineno, next_stmt.col_offset)
+            issues.append(Issue(
+                issue_type="UNREACHABLE_CODE",
+                message="Code after return statement in a function is unreachable.",
+                location=loc,
+                evidence=seg(next_stmt) or "<stmt>",
+                hint="Remove unreachable code or move it before the return."
+            ))
+    return issues
+
 
 def detect_factorial_base_case_heuristic(tree: ast.AST) -> List[Dict[str, Any]]:
     """
     Detect a function named 'factorial' that returns 0 for base case.
     """
     issues = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef) and node.name.lower() == "factorial":
-            # search for return const 0
-            for r in ast.walk(node):
-                if isinstance(r, ast.Return) and isinstance(r.value, ast.Constant) and r.value.value == 0:
-                    loc = _first_location(r)
-                    issues.append({
-                        "issue_type": "FACTORIAL_BASE_CASE",
-                        "message": "factorial() returns 0 for base case; expected 1 for factorial(0).",
-                        "location": loc,
-                        "evidence": ast.get_source_segment(getattr(tree, "source", ""), r) or "return 0",
-                        "hint": "Change base-case return to 1.",
-                        "suggested_patch": {
-                            "kind": "text_replace",
-                            "pattern": r"return\s+0",
-                            "replacement": "return 1"
-                        }
-                    })
-    return issues
+    seg = _tree_segment_getter(tree)
+    for node in _iter_nodes(tree):
+        if isinstance(node, ast.FunctionDef):
+            issues.extend(_factorial_base_case_issues(node, seg))
+    return _issue_dicts(issues)
 
 
 def detect_recursive_no_progress(tree: ast.AST, code: str) -> List[Dict[str, Any]]:
@@ -113,68 +470,19 @@ def detect_recursive_no_progress(tree: ast.AST, code: str) -> List[Dict[str, Any
     progress (no -1 or similar).
     """
     issues = []
-    for node in ast.walk(tree):
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.FunctionDef):
-            func_name = node.name
-            # find any call nodes invoking func_name
-            recursive_calls = []
-            for call in [n for n in ast.walk(node) if isinstance(n, ast.Call)]:
-                if isinstance(call.func, ast.Name) and call.func.id == func_name:
-                    recursive_calls.append(call)
-
-            if not recursive_calls:
-                continue
-
-            # check if any argument in recursive call indicates progress (BinOp with Sub)
-            progress_found = False
-            for call in recursive_calls:
-                for arg in call.args:
-                    if isinstance(arg, ast.BinOp) and isinstance(arg.op, (ast.Sub, ast.Div, ast.FloorDiv)):
-                        progress_found = True
-                        break
-                    # check for literal decrement: x-1 expressed as ast.UnaryOp? usually BinOp.
-                if progress_found:
-                    break
-
-            if not progress_found:
-                # conservatively ensure there is a base-case return that halts recursion
-                has_base_case = False
-                for ret in [n for n in ast.walk(node) if isinstance(n, ast.Return)]:
-                    # detect comparisons like if n == 0: return ...
-                    # look for Compare nodes in function body
-                    if any(isinstance(n2, ast.Compare) for n2 in ast.walk(node)):
-                        has_base_case = True
-                        break
-                loc = _first_location(node)
-                issues.append({
-                    "issue_type": "RECURSION_NO_PROGRESS",
-                    "message": f"Function '{func_name}' appears recursive but no obvious progress toward base case detected.",
-                    "location": loc,
-                    "evidence": f"recursive calls: {len(recursive_calls)}; no decrement patterns found",
-                    "hint": "Ensure recursive calls modify arguments toward the base case (e.g., n-1).",
-                })
-    return issues
+            issues.extend(_recursive_no_progress_issues(node))
+    return _issue_dicts(issues)
 
 
 def detect_mutable_default_args(tree: ast.AST) -> List[Dict[str, Any]]:
     issues = []
-    for node in ast.walk(tree):
+    seg = _tree_segment_getter(tree)
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.FunctionDef):
-            for arg, default in zip(reversed(node.args.args), reversed(node.args.defaults)):
-                # zip reversed aligns defaults with last args
-                if default is None:
-                    continue
-                if isinstance(default, (ast.List, ast.Dict, ast.Set, ast.Call)) or \
-                   (isinstance(default, ast.Constant) and isinstance(default.value, (list, dict, set))):
-                    loc = _first_location(default)
-                    issues.append({
-                        "issue_type": "MUTABLE_DEFAULT_ARG",
-                        "message": "Function has mutable default argument which can lead to shared-state bugs.",
-                        "location": loc,
-                        "evidence": ast.get_source_segment(getattr(tree, "source", ""), default) or "mutable default",
-                        "hint": "Use None as default and set inside function body."
-                    })
-    return issues
+            issues.extend(_mutable_default_issues(node, seg))
+    return _issue_dicts(issues)
 
 
 def detect_off_by_one_index_usage(tree: ast.AST, code: str) -> List[Dict[str, Any]]:
@@ -183,31 +491,16 @@ def detect_off_by_one_index_usage(tree: ast.AST, code: str) -> List[Dict[str, An
     this may be an off-by-one error.
     """
     issues = []
-    for node in ast.walk(tree):
-        # find subscript patterns
-        if isinstance(node, ast.Subscript):
-            # check for BinOp inside slice like a[i+1]
-            if isinstance(node.slice, ast.BinOp) and isinstance(node.slice.op, ast.Add):
-                # find enclosing loop (for)
-                parent = getattr(node, "parent", None)
-                # loosely detect: if there's a for loop above that iterates using range(len(...))
-                cur = node
-                found_for = None
-                while cur:
-                    cur = getattr(cur, "parent", None)
-                    if isinstance(cur, ast.For):
-                        found_for = cur
-                        break
-                if found_for:
-                    loc = _first_location(node)
-                    issues.append({
-                        "issue_type": "OFF_BY_ONE_INDEX",
-                        "message": "Possible off-by-one index usage (accessing i+1 inside loop over sequence).",
-                        "location": loc,
-                        "evidence": ast.get_source_segment(getattr(tree, "source", ""), node) or "subscript with +1",
-                        "hint": "Check loop bounds and whether you might exceed sequence length."
-                    })
-    return issues
+    seg = _tree_segment_getter(tree)
+    # explicit (node, inside_for) stack: ast nodes carry no parent links
+    stack = [(tree, False)]
+    while stack:
+        node, in_for = stack.pop()
+        if in_for and isinstance(node, ast.Subscript) and _is_plus_offset_subscript(node):
+            issues.append(_off_by_one_issue(node, seg))
+        in_for = in_for or isinstance(node, ast.For)
+        stack.extend((child, in_for) for child in reversed(list(ast.iter_child_nodes(node))))
+    return _issue_dicts(issues)
 
 
 def detect_constant_index_out_of_range(tree: ast.AST, code: str) -> List[Dict[str, Any]]:
@@ -216,88 +509,50 @@ def detect_constant_index_out_of_range(tree: ast.AST, code: str) -> List[Dict[st
     flag index out of range potential.
     """
     issues = []
-    # map variable to literal list length when assignment like arr = [1,2,3]
     literal_lengths = {}
-    for node in ast.walk(tree):
+    const_subscripts = []
+    # one walk; subscripts are checked afterwards since literal lengths must be complete
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.Assign):
-            if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
-                name = node.targets[0].id
-                if isinstance(node.value, (ast.List, ast.Tuple)):
-                    literal_lengths[name] = len(node.value.elts)
-    # detect const subscripts
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Subscript):
-            if isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, int):
-                idx = node.slice.value
-                if isinstance(node.value, ast.Name) and node.value.id in literal_lengths:
-                    ln = literal_lengths[node.value.id]
-                    if idx >= ln or idx < -ln:
-                        loc = _first_location(node)
-                        issues.append({
-                            "issue_type": "POTENTIAL_INDEX_OUT_OF_RANGE",
-                            "message": f"Index {idx} on literal '{node.value.id}' of length {ln} will be out of range.",
-                            "location": loc,
-                            "evidence": f"{node.value.id}[{idx}]",
-                            "hint": f"Use a valid index (< {ln}) or guard access with bounds check."
-                        })
-    return issues
+            lit = _literal_length(node)
+            if lit:
+                literal_lengths[lit[0]] = lit[1]
+        elif isinstance(node, ast.Subscript):
+            sub = _constant_subscript(node)
+            if sub:
+                const_subscripts.append((node, sub[0], sub[1]))
+    for node, name, idx in const_subscripts:
+        if name in literal_lengths:
+            issue = _index_out_of_range_issue(node, name, idx, literal_lengths[name])
+            if issue:
+                issues.append(issue)
+    return _issue_dicts(issues)
 
 
 def detect_always_true_false_conditions(tree: ast.AST) -> List[Dict[str, Any]]:
     issues = []
-    for node in ast.walk(tree):
+    seg = _tree_segment_getter(tree)
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.If):
-            # check for Compare node with constant true/false or identity misuse
-            for comp in [n for n in ast.walk(node.test) if isinstance(n, ast.Compare)]:
-                for c in comp.comparators:
-                    if isinstance(c, ast.Constant) and isinstance(c.value, bool):
-                        loc = _first_location(comp)
-                        issues.append({
-                            "issue_type": "SUSPICIOUS_BOOLEAN_COMPARE",
-                            "message": "Suspicious boolean comparison (comparison to True/False).",
-                            "location": loc,
-                            "evidence": ast.get_source_segment(getattr(tree, "source", ""), comp) or "compare to bool",
-                            "hint": "Prefer direct truthiness checks (if x:) or use '==' only when intended."
-                        })
-    return issues
+            issues.extend(_boolean_compare_issues(node, seg))
+    return _issue_dicts(issues)
 
 
 def detect_shadowing_builtins(tree: ast.AST) -> List[Dict[str, Any]]:
     shadow_issues = []
-    builtins_set = set(dir(__builtins__))
-    for node in ast.walk(tree):
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.Assign):
-            for t in node.targets:
-                if isinstance(t, ast.Name) and t.id in builtins_set:
-                    loc = _first_location(t)
-                    shadow_issues.append({
-                        "issue_type": "SHADOW_BUILTIN",
-                        "message": f"Assignment shadows builtin '{t.id}'.",
-                        "location": loc,
-                        "evidence": t.id,
-                        "hint": "Rename variable to avoid shadowing builtins."
-                    })
-    return shadow_issues
+            shadow_issues.extend(_shadow_builtin_issues(node))
+    return _issue_dicts(shadow_issues)
 
 
 def detect_unreachable_code(tree: ast.AST) -> List[Dict[str, Any]]:
     issues = []
-    for node in ast.walk(tree):
+    seg = _tree_segment_getter(tree)
+    for node in _iter_nodes(tree):
         if isinstance(node, ast.FunctionDef):
-            body = node.body
-            for i, stmt in enumerate(body[:-1]):
-                if isinstance(stmt, ast.Return):
-                    # anything after a return in the same block is unreachable
-                    next_stmt = body[i + 1]
-                    loc = _first_location(next_stmt)
-                    issues.append({
-                        "issue_type": "UNREACHABLE_CODE",
-                        "message": "Code after return statement in a function is unreachable.",
-                        "location": loc,
-                        "evidence": ast.get_source_segment(getattr(tree, "source", ""), next_stmt) or "<stmt>",
-                        "hint": "Remove unreachable code or move it before the return."
-                    })
-    return issues
+            issues.extend(_unreachable_code_issues(node, seg))
+    return _issue_dicts(issues)
 
 
 # Aggregate static detectors
@@ -313,6 +568,82 @@ STATIC_DETECTORS = [
 ]
 
 
+class _UnifiedDetector(ast.NodeVisitor):
+    """
+    Runs every STATIC_DETECTORS heuristic in one traversal.
+    Issues are collected per detector and concatenated in STATIC_DETECTORS order,
+    so the output groups the same way as running the detectors one by one.
+    """
+
+    def __init__(self, seg: Callable[[ast.AST], Optional[str]]):
+        self.seg = seg
+        self.factorial = []
+        self.recursion = []
+        self.mutable_defaults = []
+        self.off_by_one = []
+        self.index_range = []
+        self.bool_compares = []
+        self.shadowing = []
+        self.unreachable = []
+        self._literal_lengths = {}
+        self._const_subscripts = []
+        self._for_depth = 0
+
+    def collect_issues(self) -> List[Issue]:
+        """Resolve deferred checks (they need the whole tree) and return all issues."""
+        # literal lengths are only complete after the traversal
+        self.index_range = []
+        for node, name, idx in self._const_subscripts:
+            if name in self._literal_lengths:
+                issue = _index_out_of_range_issue(node, name, idx, self._literal_lengths[name])
+                if issue:
+                    self.index_range.append(issue)
+        return (
+            self.factorial + self.recursion + self.mutable_defaults + self.off_by_one
+            + self.index_range + self.bool_compares + self.shadowing + self.unreachable
+        )
+
+    def visit_FunctionDef(self, node):
+        self.factorial.extend(_factorial_base_case_issues(node, self.seg))
+        self.recursion.extend(_recursive_no_progress_issues(node))
+        self.mutable_defaults.extend(_mutable_default_issues(node, self.seg))
+        self.unreachable.extend(_unreachable_code_issues(node, self.seg))
+        self.generic_visit(node)
+
+    def visit_For(self, node):
+        # anything under a for loop (target, iter, body) counts as "inside the loop"
+        self._for_depth += 1
+        self.generic_visit(node)
+        self._for_depth -= 1
+
+    def visit_Subscript(self, node):
+        if self._for_depth and _is_plus_offset_subscript(node):
+            self.off_by_one.append(_off_by_one_issue(node, self.seg))
+        sub = _constant_subscript(node)
+        if sub:
+            self._const_subscripts.append((node, sub[0], sub[1]))
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        lit = _literal_length(node)
+        if lit:
+            self._literal_lengths[lit[0]] = lit[1]
+        self.shadowing.extend(_shadow_builtin_issues(node))
+        self.generic_visit(node)
+
+    def visit_If(self, node):
+        self.bool_compares.extend(_boolean_compare_issues(node, self.seg))
+        self.generic_visit(node)
+
+    def _skip(self, node):
+        # subtree holds no For/FunctionDef/Subscript/Assign/If: don't descend
+        pass
+
+    visit_Name = visit_Constant = _skip
+    visit_Import = visit_ImportFrom = visit_alias = _skip
+    visit_Pass = visit_Break = visit_Continue = visit_Global = visit_Nonlocal = _skip
+
+
 # ---------------------------
 # Test generation heuristics
 # ---------------------------
@@ -358,14 +689,20 @@ def _generate_basic_tests_for_function(func_node: ast.FunctionDef) -> List[Dict[
 def generate_tests(code: str) -> List[Dict[str, Any]]:
     """
     Inspect AST for function definitions and generate small tests.
+    Memoized per source text; each call gets its own copies of the test dicts.
     """
+    # no "def" anywhere means no FunctionDef, so nothing to test
+    if "def" not in code:
+        return []
+    return [dict(t) for t in _generate_tests_cached(code)]
+
+
+@functools.lru_cache(maxsize=_AST_CACHE_MAX)
+def _generate_tests_cached(code: str) -> Tuple[Dict[str, Any], ...]:
     tests = []
-    tree = _ast_parse_safe(code)
+    tree = _ast_parse_cached(code)
     if tree is None:
-        return tests
-
-    # attach source to tree to help detectors (for evidence)
-    setattr(tree, "source", code)
+        return ()
 
     for node in tree.body:
         if isinstance(node, ast.FunctionDef):
@@ -377,7 +714,7 @@ def generate_tests(code: str) -> List[Dict[str, Any]]:
                     "expected": t["expected"],
                     "description": t["description"]
                 })
-    return tests
+    return tuple(tests)
 
 
 def detect_known_patterns(code: str):
@@ -397,7 +734,7 @@ def detect_known_patterns(code: str):
             "problem": "Memoization bug: returning wrong key",
             "suggested_patch": {
                 "kind": "text_replace",
-                "pattern": r"memo\[0\]",
+                "pattern": _RE_MEMO0.pattern,
                 "replacement": "memo[n]"
             }
         })
@@ -409,56 +746,50 @@ def detect_known_patterns(code: str):
 # Running tests dynamically
 # ---------------------------
 
+# Driver script: defines the user code by pasting it between _DRIVER_HEAD and
+# _DRIVER_TAIL, then runs each test and prints the JSON results. Only the tail is
+# filled with str.format, so only its literal braces are doubled.
+_DRIVER_HEAD = """import json, sys, traceback
+results = []
+def _run_test(fn_call):
+    try:
+        # eval the call and stringify result
+        val = eval(fn_call, globals())
+        return {'ok': True, 'result': repr(val), 'error': None}
+    except Exception as e:
+        tb = traceback.format_exc()
+        return {'ok': False, 'result': None, 'error': tb}
+
+# --- Begin user code ---
+"""
+
+_DRIVER_TAIL = """
+# --- End user code ---
+
+try:
+    tests = {tests_json}
+    for t in tests:
+        res = _run_test(t['call'])
+        out = {{'call': t['call'], 'expected': t['expected'], 'ok': res['ok'], 'result': res['result'], 'error': res['error'], 'description': t.get('description')}}
+        results.append(out)
+except Exception as e:
+    results.append({{'call': None, 'expected': None, 'ok': False, 'result': None, 'error': str(e)}})
+print(json.dumps(results))"""
+
+
 def _build_test_driver(code: str, tests: List[Dict[str, Any]]) -> str:
     """
     Build a python -c driver that imports/defines the code and runs tests,
     printing JSON of results to stdout.
     """
-    # The safe approach: create a script that defines functions from `code` (by pasting)
-    # then runs each test and prints JSON result
-    wrapper = []
-    # protect against prints in user code by redirecting stdout inside individual tests
-    wrapper.append("import json, sys, traceback")
-    wrapper.append("results = []")
-    wrapper.append("def _run_test(fn_call):")
-    wrapper.append("    try:")
-    wrapper.append("        # eval the call and stringify result")
-    wrapper.append("        val = eval(fn_call, globals())")
-    wrapper.append("        return {'ok': True, 'result': repr(val), 'error': None}")
-    wrapper.append("    except Exception as e:")
-    wrapper.append("        tb = traceback.format_exc()")
-    wrapper.append("        return {'ok': False, 'result': None, 'error': tb}")
-    wrapper.append("")
-    # inject user code
-    # ensure no encoding issues
-    wrapper.append("# --- Begin user code ---")
-    for line in code.splitlines():
-        wrapper.append(line)
-    wrapper.append("# --- End user code ---")
-    wrapper.append("")
-    # add tests
-    wrapper.append("try:")
-    wrapper.append("    tests = []")
-    for t in tests:
-        call = t["call"].replace('"', r'\"')
-        wrapper.append(f"    tests.append({json.dumps(t)})")
-    wrapper.append("    for t in tests:")
-    wrapper.append("        res = _run_test(t['call'])")
-    wrapper.append("        out = {'call': t['call'], 'expected': t['expected'], 'ok': res['ok'], 'result': res['result'], 'error': res['error'], 'description': t.get('description')}")
-    wrapper.append("        results.append(out)")
-    wrapper.append("except Exception as e:")
-    wrapper.append("    results.append({'call': None, 'expected': None, 'ok': False, 'result': None, 'error': str(e)})")
-    wrapper.append("print(json.dumps(results))")
-    driver = "\n".join(wrapper)
-    return driver
+    # one concatenation; the code itself is pasted verbatim, never re-split
+    return _DRIVER_HEAD + code + _DRIVER_TAIL.format(tests_json=json.dumps(tests, separators=(",", ":")))
 
 
-def run_tests_in_subprocess(code: str, tests: List[Dict[str, Any]], timeout: float = 1.0) -> List[Dict[str, Any]]:
+def _run_tests_one_shot(code: str, tests: List[Dict[str, Any]], timeout: float = 1.0) -> List[Dict[str, Any]]:
     """
-    Runs the generated tests in a subprocess and returns parsed JSON results.
+    Fallback runner: one `python -c` process per call.
     """
-    if not tests:
-        return []
     driver = _build_test_driver(code, tests)
     stdout, stderr, rc = _safe_run_python(driver, timeout=timeout)
     if stderr and stderr != "TIMEOUT" and not stdout:
@@ -467,13 +798,13 @@ def run_tests_in_subprocess(code: str, tests: List[Dict[str, Any]], timeout: flo
     results = []
     if stdout:
         try:
-            results = json.loads(stdout)
+            results = orjson.loads(stdout)
         except Exception:
             # try fallback: sometimes extra prints appear; extract JSON substring
-            m = re.search(r"(\[.*\])", stdout, re.S)
+            m = _RE_JSON_ARR.search(stdout)
             if m:
                 try:
-                    results = json.loads(m.group(1))
+                    results = orjson.loads(m.group(1))
                 except Exception:
                     results = []
     # If timed out
@@ -482,6 +813,80 @@ def run_tests_in_subprocess(code: str, tests: List[Dict[str, Any]], timeout: flo
     return results
 
 
+_TIMEOUT_RESULT = {"call": None, "expected": None, "ok": False, "result": None, "error": "TIMEOUT"}
+_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_runner_worker.py")
+# extra time allowed for the worker to fork/report on top of the test timeout
+_WORKER_GRACE = 2.0
+
+
+# Long-lived test workers (fixer/_runner_worker.py), one per core. Each forks a
+# fresh child per request, so user code never shares state across calls; only
+# the interpreter start-up is amortized.
+_RUNNERS = WorkerPool(lambda: [_python_executable(), "-u", _WORKER_PATH])
+
+
+def _worker_results(resp: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # a lost worker is reported like a test timeout
+    if resp is None or resp.get("timeout"):
+        return [dict(_TIMEOUT_RESULT)]
+    return resp.get("results", [])
+
+
+def run_tests_in_subprocess(code: str, tests: List[Dict[str, Any]], timeout: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Runs the generated tests in a subprocess and returns parsed JSON results.
+    Uses a pooled persistent worker on POSIX (needs fork), else a one-shot process.
+    """
+    if not tests:
+        return []
+    if not hasattr(os, "fork"):
+        return _run_tests_one_shot(code, tests, timeout=timeout)
+    try:
+        with _RUNNERS.worker() as runner:
+            resp = runner.roundtrip({"code": code, "tests": tests, "timeout": timeout}, timeout + _WORKER_GRACE)
+        return _worker_results(resp)
+    except Exception as e:
+        logger.debug("run_tests_in_subprocess: persistent worker failed (%s); falling back", e)
+        return _run_tests_one_shot(code, tests, timeout=timeout)
+
+
+def run_tests_batch(jobs: List[Tuple[str, List[Dict[str, Any]]]], timeout: float = 1.0) -> List[List[Dict[str, Any]]]:
+    """
+    Run several (code, tests) jobs in one worker round-trip.
+    Each job still executes in fresh globals; `timeout` applies per job.
+    Returns one result list per job, in order.
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in jobs]
+    pending = [i for i, (_, tests) in enumerate(jobs) if tests]
+    if not pending:
+        return results
+    if hasattr(os, "fork"):
+        req = {"jobs": [{"code": jobs[i][0], "tests": jobs[i][1]} for i in pending], "timeout": timeout}
+        try:
+            with _RUNNERS.worker() as runner:
+                resp = runner.roundtrip(req, len(pending) * timeout + _WORKER_GRACE)
+            if resp is None:
+                batch = [_worker_results(None) for _ in pending]
+            else:
+                batch = [_worker_results(r) for r in resp.get("batch", [])]
+            if len(batch) == len(pending):
+                for i, res in zip(pending, batch):
+                    results[i] = res
+                return results
+        except Exception as e:
+            logger.debug("run_tests_batch: persistent worker failed (%s); falling back", e)
+    for i in pending:
+        code, tests = jobs[i]
+        results[i] = _run_tests_one_shot(code, tests, timeout=timeout)
+    return results
+
+
+# Runs dynamic tests alongside static analysis in inspect_and_test; the threads
+# share the _RUNNERS pool.
+_DYNAMIC_WORKERS = 4
+_DYNAMIC_EXEC = ThreadPoolExecutor(max_workers=_DYNAMIC_WORKERS, thread_name_prefix="logic-tests")
+
+
 # ---------------------------
 # Synthesis: analyze test results and propose hints
 # ---------------------------
@@ -491,7 +896,7 @@ def analyze_test_results(tests: List[Dict[str, Any]], results: List[Dict[str, An
     For failing tests, produce issue objects with hints and safe small patches if possible.
     """
     issues = []
-    tree = _ast_parse_safe(code)
+    tree = _ast_parse_cached(code)
     if tree is None:
         return issues
 
@@ -501,35 +906,35 @@ def analyze_test_results(tests: List[Dict[str, Any]], results: List[Dict[str, An
             call = t["call"]
             desc = t.get("description", "")
             # Heuristics for known patterns (factorial)
-            if re.match(r".*factorial\(", call):
+            if _RE_FACT_CALL.match(call):
                 # search for "return 0" in factorial function
-                if re.search(r"def\s+factorial\s*\(", code):
-                    m = re.search(r"(def\s+factorial\s*\(.*?\):)([\s\S]*?)(?=def\s|\Z)", code)
+                if _RE_DEF_FACT.search(code):
+                    m = _RE_FACT_BODY.search(code)
                     if m:
                         body = m.group(2)
-                        if re.search(r"return\s+0\b", body):
-                            issues.append({
-                                "issue_type": "TEST_FAILURE_FACTORIAL_BASE",
-                                "message": f"factorial function fails test '{desc}'.",
-                                "location": _first_location(maybe_node_from_name(tree, "factorial")),
-                                "evidence": f"test call: {call}, error: {r.get('error')}",
-                                "hint": "Change factorial base-case to return 1.",
-                                "suggested_patch": {
+                        if _RE_RETURN_0.search(body):
+                            issues.append(Issue(
+                                issue_type="TEST_FAILURE_FACTORIAL_BASE",
+                                message=f"factorial function fails test '{desc}'.",
+                                location=_first_location(maybe_node_from_name(tree, "factorial")),
+                                evidence=f"test call: {call}, error: {r.get('error')}",
+                                hint="Change factorial base-case to return 1.",
+                                suggested_patch={
                                     "kind": "text_replace",
-                                    "pattern": r"(def\s+factorial\s*\(.*?\):)([\s\S]*?)return\s+0\b",
+                                    "pattern": _RE_FACT_PATCH.pattern,
                                     "replacement": r"\1\2return 1"
                                 }
-                            })
+                            ))
                             continue
             # Generic failing test issue
-            issues.append({
-                "issue_type": "TEST_FAILURE",
-                "message": f"Test '{desc}' for call {call} failed.",
-                "location": None,
-                "evidence": f"error: {r.get('error')}",
-                "hint": "Inspect function logic or run test locally with prints."
-            })
-    return issues
+            issues.append(Issue(
+                issue_type="TEST_FAILURE",
+                message=f"Test '{desc}' for call {call} failed.",
+                location=None,
+                evidence=f"error: {r.get('error')}",
+                hint="Inspect function logic or run test locally with prints."
+            ))
+    return _issue_dicts(issues)
 
 
 def maybe_node_from_name(tree: ast.AST, name: str) -> Optional[ast.AST]:
@@ -543,76 +948,88 @@ def maybe_node_from_name(tree: ast.AST, name: str) -> Optional[ast.AST]:
 # High-level inspector
 # ---------------------------
 
-def inspect_and_test(code: str, timeout: float = 1.0) -> Dict[str, Any]:
+def _run_static_detectors(tree: ast.AST, code: str) -> List[Dict[str, Any]]:
     """
-    Enhanced logical detector:
-      - instant pattern-based logical detection for known bugs
-      - static AST analysis
-      - dynamic test generation + execution
+    Single-pass static analysis; if the unified visitor trips over an unusual
+    tree, fall back to running each detector alone so one failure only loses
+    that detector's findings.
     """
+    try:
+        detector = _UnifiedDetector(_tree_segment_getter(tree, code))
+        detector.visit(tree)
+        return _issue_dicts(detector.collect_issues())
+    except Exception as e:
+        logger.debug("Unified static detector raised: %s", e)
+
+    static_issues = []
+    for detector in STATIC_DETECTORS:
+        try:
+            if detector.__code__.co_argcount == 2:
+                issues = detector(tree, code)
+            else:
+                issues = detector(tree)
+
+            if issues:
+                static_issues.extend(issues)
+
+        except Exception as e:
+            logger.debug("Static detector %s raised: %s", detector.__name__, e)
+    return static_issues
+
+
+def _new_result(issues: Optional[List[Dict[str, Any]]] = None, note: Optional[str] = None) -> Dict[str, Any]:
     result = {
-        "issues": [],
+        "issues": list(issues or []),
         "tests": [],
         "test_results": []
     }
+    if note is not None:
+        result["note"] = note
+    return result
 
-    tree = _ast_parse_safe(code)
-    if tree is not None:
-        setattr(tree, "source", code)
 
+def _known_pattern_result(code: str) -> Optional[Dict[str, Any]]:
     # ---------------------------------------------------------
     # 1. FAST KNOWN-BUG STATIC PATTERN DETECTION (NEW)
     # ---------------------------------------------------------
     fast_issues = detect_known_patterns(code)
     if fast_issues:
         # These are always high-confidence → return immediately
-        result["issues"].extend(fast_issues)
-        result["note"] = "Known logical pattern detected (fast)."
-        return result
-
-    # ---------------------------------------------------------
-    # 2. STATIC ANALYSIS USING REGISTERED DETECTORS
-    # ---------------------------------------------------------
-    if tree is not None:
-        static_issues = []
-        for detector in STATIC_DETECTORS:
-            try:
-                if detector.__code__.co_argcount == 2:
-                    issues = detector(tree, code)
-                else:
-                    issues = detector(tree)
-
-                if issues:
-                    static_issues.extend(issues)
+        return _new_result(fast_issues, "Known logical pattern detected (fast).")
+    return None
 
-            except Exception as e:
-                logger.debug(f"Static detector {detector.__name__} raised: {e}")
 
-        result["issues"].extend(static_issues)
+def _may_have_static_issues(code: str) -> bool:
+    """
+    Cheap text pre-check: False only when no static detector can fire. Function
+    checks need `def`; literal/shadowing checks need an `=`; off-by-one needs a
+    `for` and a subscript; bool compares need an `if` and True/False.
+    """
+    return (
+        "def" in code
+        or "=" in code
+        or ("for" in code and "[" in code)
+        or ("if" in code and ("True" in code or "False" in code))
+    )
 
-        # If static detectors already found issues → skip dynamic tests
-        if static_issues:
-            result["note"] = "Static logical issues detected."
-            return result
 
+def _static_result(code: str, tree: Optional[ast.AST]) -> Optional[Dict[str, Any]]:
     # ---------------------------------------------------------
-    # 3. TEST GENERATION
+    # 2. STATIC ANALYSIS USING REGISTERED DETECTORS
     # ---------------------------------------------------------
-    tests = generate_tests(code)
-    result["tests"] = tests
+    # skipped outright for def-less scripts like print("hello")
+    if tree is not None and _may_have_static_issues(code):
+        static_issues = _run_static_detectors(tree, code)
+        # If static detectors already found issues → skip dynamic tests
+        if static_issues:
+            return _new_result(static_issues, "Static logical issues detected.")
+    return None
 
-    if not tests:
-        result["note"] = "No tests generated. No static issues found."
-        return result
 
-    # ---------------------------------------------------------
-    # 4. DYNAMIC TEST EXECUTION
-    # ---------------------------------------------------------
-    start = time.time()
-    test_results = run_tests_in_subprocess(code, tests, timeout=timeout)
-    elapsed = time.time() - start
-
-    logger.debug(f"run_tests_in_subprocess finished in {elapsed:.3f}s")
+def _dynamic_stage(code: str, tests: List[Dict[str, Any]], test_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn executed test results into the final inspect_and_test result."""
+    result = _new_result()
+    result["tests"] = tests
     result["test_results"] = test_results
 
     # ---------------------------------------------------------
@@ -636,12 +1053,112 @@ def inspect_and_test(code: str, timeout: float = 1.0) -> Dict[str, Any]:
     return result
 
 
+def _no_tests_result(tests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    result = _new_result(note="No tests generated. No static issues found.")
+    result["tests"] = tests
+    return result
+
+
+def inspect_and_test(code: str, timeout: float = 1.0) -> Dict[str, Any]:
+    """
+    Enhanced logical detector:
+      - instant pattern-based logical detection for known bugs
+      - static AST analysis
+      - dynamic test generation + execution
+    """
+    tree = _ast_parse_cached(code)
+
+    done = _known_pattern_result(code)
+    if done is not None:
+        return done
+
+    # ---------------------------------------------------------
+    # 3. TEST GENERATION
+    # ---------------------------------------------------------
+    # The subprocess round-trip dominates; start it on the executor while the
+    # static detectors walk the tree. Its result is only used if they find nothing.
+    tests = generate_tests(code)
+    start = time.time()
+    future_dyn = _DYNAMIC_EXEC.submit(run_tests_in_subprocess, code, tests, timeout) if tests else None
+
+    done = _static_result(code, tree)
+    if done is not None:
+        if future_dyn is not None:
+            future_dyn.cancel()
+        return done
+
+    if not tests:
+        return _no_tests_result(tests)
+
+    # ---------------------------------------------------------
+    # 4. DYNAMIC TEST EXECUTION
+    # ---------------------------------------------------------
+    test_results = future_dyn.result()
+    elapsed = time.time() - start
+
+    logger.debug("run_tests_in_subprocess finished in %.3fs", elapsed)
+    return _dynamic_stage(code, tests, test_results)
+
+
+def inspect_and_test_many(codes: List[str], timeout: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    inspect_and_test for several snippets. Static stages run per snippet; the
+    dynamic tests of every snippet that needs them run in one run_tests_batch call.
+    Returns one result per snippet, in order.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    pending = []  # (index, code, tests)
+    for code in codes:
+        done = _known_pattern_result(code) or _static_result(code, _ast_parse_cached(code))
+        if done is None:
+            tests = generate_tests(code)
+            if tests:
+                pending.append((len(results), code, tests))
+            else:
+                done = _no_tests_result(tests)
+        results.append(done)
+
+    start = time.time()
+    batch = run_tests_batch([(code, tests) for _, code, tests in pending], timeout=timeout)
+    logger.debug("run_tests_batch finished %d jobs in %.3fs", len(pending), time.time() - start)
+    for (idx, code, tests), test_results in zip(pending, batch):
+        results[idx] = _dynamic_stage(code, tests, test_results)
+    return results
+
+
+_REGEX_META = frozenset(".^$*+?{}[]()|")
+_compile_patch = functools.lru_cache(maxsize=256)(re.compile)
+
+
+@functools.lru_cache(maxsize=256)
+def _literal_pattern(pattern: str) -> Optional[str]:
+    """
+    The plain text a patch pattern matches, or None if it needs the regex engine.
+    Escaped punctuation (e.g. memo\\[0\\]) counts as literal; classes such as \\s do not.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            nxt = pattern[i + 1] if i + 1 < n else ""
+            if not nxt or nxt.isalnum() or not nxt.isascii():
+                return None
+            out.append(nxt)
+            i += 2
+            continue
+        if c in _REGEX_META:
+            return None
+        out.append(c)
+        i += 1
+    return "".join(out) or None
+
+
 def _apply_suggested_patches(code: str, issues: list) -> str:
     """
     Safe small regex-based patch applier used by iteration controller.
     Delegates to suggested_patch instructions in issues (if any).
     """
-    import re
     patched = code
     for issue in issues:
         patch = issue.get("suggested_patch")
@@ -649,7 +1166,12 @@ def _apply_suggested_patches(code: str, issues: list) -> str:
             continue
         if patch.get("kind") == "text_replace":
             try:
-                new = re.sub(patch["pattern"], patch["replacement"], patched)
+                pattern, replacement = patch["pattern"], patch["replacement"]
+                literal = _literal_pattern(pattern)
+                if literal is not None and "\\" not in replacement:
+                    new = patched.replace(literal, replacement)
+                else:
+                    new = _compile_patch(pattern).sub(replacement, patched)
                 if new != patched:
                     patched = new
             except Exception:
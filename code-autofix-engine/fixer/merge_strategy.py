@@ -19,9 +19,10 @@ Behavior:
 
 from __future__ import annotations
 import ast
+import functools
 import logging
 import re
-from typing import List, Optional
+from typing import FrozenSet, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -31,50 +32,72 @@ MAX_ADDED_IMPORTS = 8
 SHRINK_THRESHOLD = 0.75  # candidate lines must be at least 75% of base lines to be accepted
 MAX_NEW_TOPLEVEL_IF_HUGE = 6  # if file huge, be stricter on new defs
 
+# --- Patterns (compiled once) ---
+_CODE_START_RE = re.compile(r'^\s*(def |class |import |from |[A-Za-z_]\w*\s*=|if |for |while |async def )')
+# one source line with its ending; only CRLF, CR and LF end lines (as in ast's numbering)
+_SOURCE_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+# top-level def/class header; group 1 is the name. Block bodies are found by
+# _block_end (no regex over the body, so no backtracking on odd LLM output).
+_DEF_HEADER_RE = re.compile(r"^(?:async[ \t]+def|def|class)[ \t]+([A-Za-z_]\w*)", re.MULTILINE)
+
 # ---------------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------------
 
-def _parse_ok(code: str) -> bool:
-    try:
-        ast.parse(code)
-        return True
-    except Exception:
-        return False
-
-def _safe_parse_tree(code: str) -> Optional[ast.Module]:
+@functools.lru_cache(maxsize=256)
+def _parse_cached(code: str) -> Optional[ast.Module]:
+    """
+    ast.parse memoized on the source text: one merge parses base, candidate and each
+    merged attempt several times, and retries resubmit the same strings.
+    str caches its own hash, so the text is the key. Returned trees are shared — read-only.
+    """
     try:
         return ast.parse(code)
     except Exception:
         return None
 
-def _top_level_names(code: str) -> List[str]:
-    tree = _safe_parse_tree(code)
+def _parse_ok(code: str) -> bool:
+    return _parse_cached(code) is not None
+
+def _safe_parse_tree(code: str) -> Optional[ast.Module]:
+    return _parse_cached(code)
+
+# statement-list fields; imports only ever appear in these, so expressions are never visited
+_STMT_LIST_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+@functools.lru_cache(maxsize=256)
+def _summary(code: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    (top-level def/class/assigned names, imported top-level modules) of code,
+    gathered in one pass over the statements. Both empty if code does not parse.
+    """
+    tree = _parse_cached(code)
     if not tree:
-        return []
-    names = []
+        return frozenset(), frozenset()
+    names = set()
     for node in tree.body:
         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            names.append(node.name)
+            names.add(node.name)
         elif isinstance(node, ast.Assign):
             for target in node.targets:
                 if isinstance(target, ast.Name):
-                    names.append(target.id)
-    return names
-
-def _imports_from_code(code: str) -> List[str]:
-    tree = _safe_parse_tree(code)
-    if not tree:
-        return []
-    imps = []
-    for node in ast.walk(tree):
+                    names.add(target.id)
+    imps = set()
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
         if isinstance(node, ast.Import):
             for a in node.names:
-                imps.append(a.name.split(".")[0])
+                imps.add(a.name.split(".")[0])
         elif isinstance(node, ast.ImportFrom):
             if node.module:
-                imps.append(node.module.split(".")[0])
-    return imps
+                imps.add(node.module.split(".")[0])
+        else:
+            for field in _STMT_LIST_FIELDS:
+                sub = getattr(node, field, None)
+                if sub:
+                    stack.extend(sub)
+    return frozenset(names), frozenset(imps)
 
 def _strip_non_code_prefix(s: str) -> str:
     """
@@ -83,40 +106,117 @@ def _strip_non_code_prefix(s: str) -> str:
     """
     lines = s.splitlines()
     for i, ln in enumerate(lines[:40]):
-        if re.match(r'^\s*(def |class |import |from |[A-Za-z_]\w*\s*=|if |for |while |async def )', ln):
+        if _CODE_START_RE.match(ln):
             return "\n".join(lines[i:])
     # if nothing matched, return original
     return s
 
+@functools.lru_cache(maxsize=64)
+def _normalized(s: str) -> str:
+    """s without surrounding blank lines and per-line trailing whitespace (for no-op detection)."""
+    return "\n".join(ln.rstrip() for ln in s.strip().splitlines())
+
 def _count_lines(s: str) -> int:
+    # LF-terminated lines, counted in C without materializing splitlines()
     if not s:
         return 0
-    return len(s.splitlines())
+    return s.count("\n") + (0 if s.endswith("\n") else 1)
 
-def _get_source_segment_for_node(code: str, node: ast.AST) -> Optional[str]:
+def _block_end(src: str, start: int) -> Optional[int]:
     """
-    Attempt to get the exact source segment for a top-level node.
-    Uses ast.get_source_segment when available; otherwise fall back to regex heuristic.
+    End offset of the def/class block whose header line starts at `start`:
+    just past the last non-blank line before the first non-blank line at column 0.
+    None unless the header line ends with ':' and an indented body follows.
+    One forward pass over the lines.
     """
-    try:
-        # ast.get_source_segment available in Python 3.8+ when original source provided
-        segment = ast.get_source_segment(code, node)
-        if segment:
-            return segment
-    except Exception:
-        pass
-
-    # Fallback: simple regex for def/class capture (approximate)
-    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-        name = node.name
-        pattern = rf"(?:^|\n)(?:async\s+def|def|class)\s+{re.escape(name)}\b[^\n]*:\n(?:\s+.*\n)+"
-        m = re.search(pattern, code)
-        if m:
-            return m.group(0)
+    n = len(src)
+    nl = src.find("\n", start)
+    if nl == -1 or src[nl - 1] != ":":
+        return None
+    end = None
+    pos = nl + 1
+    while pos < n:
+        nl = src.find("\n", pos)
+        line_end = n if nl == -1 else nl + 1
+        if src[pos:line_end].strip():
+            if not src[pos].isspace():
+                break
+            end = line_end
+        pos = line_end
+    return end
+
+def _extract_def_block(src: str, name: str) -> Optional[Tuple[int, int]]:
+    """(start, end) of the first top-level def/class block named `name` in src, or None."""
+    idx = src.find(name)
+    while idx != -1:
+        line_start = src.rfind("\n", 0, idx) + 1
+        m = _DEF_HEADER_RE.match(src, line_start)
+        if m and m.start(1) == idx and m.end(1) == idx + len(name):
+            end = _block_end(src, line_start)
+            if end is not None:
+                return line_start, end
+        idx = src.find(name, idx + 1)
     return None
 
-def _safe_replace_first(target: str, pattern: str, replacement: str) -> str:
-    return re.sub(pattern, replacement, target, count=1, flags=re.MULTILINE)
+def _def_blocks(src: str) -> List[Tuple[str, str]]:
+    """All top-level def/class blocks in src as (block text, name), in order."""
+    blocks = []
+    for m in _DEF_HEADER_RE.finditer(src):
+        end = _block_end(src, m.start())
+        if end is not None:
+            blocks.append((src[m.start():end], m.group(1)))
+    return blocks
+
+@functools.lru_cache(maxsize=16)
+def _source_lines(code: str) -> Tuple[str, ...]:
+    """code split into lines, endings kept, numbered the way ast numbers them."""
+    return tuple(_SOURCE_LINE_RE.findall(code))
+
+def _get_source_segment_for_node(code: str, node: ast.AST) -> Optional[str]:
+    """
+    Source of a top-level node: its whole lines lineno..end_lineno, without the final line end.
+    Top-level nodes start at column 0, so this is ast.get_source_segment (plus any trailing
+    comment on the last line) without re-splitting the source on every call.
+    """
+    end = getattr(node, "end_lineno", None)
+    if end is None:
+        return None
+    segment = "".join(_source_lines(code)[node.lineno - 1:end])
+    return segment.rstrip("\r\n") or None
+
+def _safe_replace_first(target: str, span: Tuple[int, int], replacement: str) -> str:
+    """Replace the block at `span` (and the newline before it) with `replacement`."""
+    start, end = span
+    return target[:max(start - 1, 0)] + replacement + target[end:]
+
+def _splice_blocks(target: str, blocks: List[Tuple[str, str]]) -> Optional[str]:
+    """
+    Apply every (block, name) replacement to target in one ordered pass; None if no name
+    is defined in target. Same text as calling _safe_replace_first per block in turn
+    (adjacent replacements share one padding newline), except that a repeated name is
+    replaced once, by its last block, instead of stacking blank lines.
+    """
+    latest = {name: blk for blk, name in blocks}
+    spans = []
+    for name, blk in latest.items():
+        span = _extract_def_block(target, name)
+        if span:
+            spans.append((span[0], span[1], blk))
+    if not spans:
+        return None
+    spans.sort()
+    out = []
+    cursor = 0
+    for start, end, blk in spans:
+        cut = max(start - 1, 0)
+        if cut < cursor:
+            out[-1] = out[-1][:-1]
+            cut = cursor
+        out.append(target[cursor:cut])
+        out.append("\n" + blk + "\n")
+        cursor = end
+    out.append(target[cursor:])
+    return "".join(out)
 
 # ---------------------------------------------------------------------------
 # Merge strategy implementation
@@ -132,27 +232,36 @@ def merge_llm_result(base: str, llm_out: str, allow_full_rewrite: bool = False)
     - allow_full_rewrite: if True, attempt function-level full rewrite fallback when minimal merges fail
 
     Returns merged_code (or base if rejected).
+
+    The merge is a pure function of its arguments, so results are memoized: retries
+    in the iteration loop often hand over the same (base, llm_out) pair again.
     """
     if not llm_out:
         return base
+    return _merge_llm_result_cached(base, llm_out, bool(allow_full_rewrite))
+
 
+@functools.lru_cache(maxsize=128)
+def _merge_llm_result_cached(base: str, llm_out: str, allow_full_rewrite: bool) -> str:
     candidate = _strip_non_code_prefix(llm_out).strip()
-    # quick normalization
-    base_lines = _count_lines(base)
-    cand_lines = _count_lines(candidate)
+    # LLM echoed the input (it saw nothing to fix): nothing to merge
+    if candidate == base.strip() or _normalized(candidate) == _normalized(base):
+        return base
+
+    # one parse of the candidate, shared by every stage below (and by _summary via the cache)
+    cand_tree = _parse_cached(candidate)
 
     # --- 1) If candidate parses fully, apply high-level heuristics (accept/reject) ---
-    if _parse_ok(candidate):
+    if cand_tree is not None:
         # Hallucination checks
-        base_names = set(_top_level_names(base))
-        cand_names = set(_top_level_names(candidate))
+        base_names, base_imports = _summary(base)
+        cand_names, cand_imports = _summary(candidate)
         added_defs = cand_names - base_names
-
-        base_imports = set(_imports_from_code(base))
-        cand_imports = set(_imports_from_code(candidate))
         new_imports = cand_imports - base_imports
 
         # Reject if candidate shrinks file massively (protect against truncation)
+        base_lines = _count_lines(base)
+        cand_lines = _count_lines(candidate)
         if base_lines > 0 and cand_lines < max(1, int(base_lines * SHRINK_THRESHOLD)):
             logger.warning("merge_llm_result: rejecting candidate because it would massively shrink the file")
             # don't accept shrink — avoid losing content
@@ -169,14 +278,11 @@ def merge_llm_result(base: str, llm_out: str, allow_full_rewrite: bool = False)
         return candidate
 
     # --- 2) Candidate doesn't parse: attempt region-preserving partial merge ---
-    try:
-        base_tree = ast.parse(base)
-    except Exception:
+    if not _parse_ok(base):
         logger.debug("merge_llm_result: base does not parse; refusing to merge / returning base")
         return base
 
     merged = base
-    cand_tree = _safe_parse_tree(candidate)
     if cand_tree:
         # Replace full top-level defs (func/class) from candidate if we can extract their source and they parse in isolation
         replaced_any = False
@@ -186,21 +292,19 @@ def merge_llm_result(base: str, llm_out: str, allow_full_rewrite: bool = False)
                 if not src_node:
                     continue
                 # validate extracted node in isolation
-                try:
-                    _ = ast.parse(src_node)
-                except Exception:
+                if not _parse_ok(src_node):
                     # not a valid isolated node
                     continue
                 # try to find existing definition in base
                 name = node.name
-                pattern = rf"(?:^|\n)(?:async\s+def|def|class)\s+{re.escape(name)}\b[^\n]*:\n(?:\s+.*\n)+"
-                if re.search(pattern, merged, flags=re.MULTILINE):
+                span = _extract_def_block(merged, name)
+                if span:
                     # replace the first occurrence
-                    merged_candidate = _safe_replace_first(merged, pattern, "\n" + src_node + "\n")
+                    merged_candidate = _safe_replace_first(merged, span, "\n" + src_node + "\n")
                     if _parse_ok(merged_candidate):
                         merged = merged_candidate
                         replaced_any = True
-                        logger.info(f"merge_llm_result: replaced definition '{name}' from candidate")
+                        logger.info("merge_llm_result: replaced definition '%s' from candidate", name)
                     else:
                         # try a more conservative inline replace: replace whole def region via AST extraction
                         # (skip if it fails)
@@ -212,25 +316,20 @@ def merge_llm_result(base: str, llm_out: str, allow_full_rewrite: bool = False)
 
     # --- 3) Partial merge failed or produced no effect: attempt more aggressive partial merge using regex fallback ---
     try:
-        # Extract function/class blocks from candidate via regex and attempt replacements
+        # Extract function/class blocks from candidate by indentation and attempt replacements
         # This is a last-ditch attempt to salvage candidate fragments
-        blocks = re.findall(r"(?:^|\n)((?:async\s+def|def|class)\s+[A-Za-z_]\w*[^\n]*:\n(?:\s+.*\n)+)", candidate, flags=re.MULTILINE)
+        blocks = _def_blocks(candidate)
         if blocks:
             tmp = merged
             replaced_any = False
-            for blk in blocks:
-                # get function/class name
-                m = re.match(r"(?:async\s+def|def|class)\s+([A-Za-z_]\w*)", blk)
-                if not m:
-                    continue
-                name = m.group(1)
-                pattern = rf"(?:^|\n)(?:async\s+def|def|class)\s+{re.escape(name)}\b[^\n]*:\n(?:\s+.*\n)+"
-                if re.search(pattern, tmp, flags=re.MULTILINE):
-                    merged_candidate = _safe_replace_first(tmp, pattern, "\n" + blk + "\n")
+            for blk, name in blocks:
+                span = _extract_def_block(tmp, name)
+                if span:
+                    merged_candidate = _safe_replace_first(tmp, span, "\n" + blk + "\n")
                     if _parse_ok(merged_candidate):
                         tmp = merged_candidate
                         replaced_any = True
-                        logger.info(f"merge_llm_result: regex replaced '{name}' block")
+                        logger.info("merge_llm_result: regex replaced '%s' block", name)
             if replaced_any and _parse_ok(tmp):
                 return tmp
     except Exception as e:
@@ -239,30 +338,31 @@ def merge_llm_result(base: str, llm_out: str, allow_full_rewrite: bool = False)
     # --- 4) No partial changes possible. If allow_full_rewrite -> attempt function-level rewrite fallback ---
     if allow_full_rewrite:
         # Extract candidate function/class blocks and try replacing them wholesale (even if candidate didn't parse)
-        blocks = re.findall(r"(?:^|\n)((?:async\s+def|def|class)\s+[A-Za-z_]\w*[^\n]*:\n(?:\s+.*\n)+)", llm_out, flags=re.MULTILINE)
+        blocks = _def_blocks(llm_out)
         if blocks:
             tmp = base
             changed = False
-            for blk in blocks:
-                m = re.match(r"(?:async\s+def|def|class)\s+([A-Za-z_]\w*)", blk)
-                if not m:
-                    continue
-                name = m.group(1)
+            # common case: every rewrite fits at once -> one splice, one parse
+            spliced = _splice_blocks(base, blocks)
+            if spliced is not None and _parse_ok(spliced):
+                tmp, changed = spliced, True
+                logger.info("merge_llm_result: full-function rewrite replaced %d block(s) in one pass", len(blocks))
+                blocks = []
+            # otherwise replace block by block, keeping only replacements that still parse
+            for blk, name in blocks:
                 # replace function body in base if present
-                pattern = rf"(?:^|\n)(?:async\s+def|def|class)\s+{re.escape(name)}\b[^\n]*:\n(?:\s+.*\n)+"
-                if re.search(pattern, tmp, flags=re.MULTILINE):
-                    candidate_replacement = _safe_replace_first(tmp, pattern, "\n" + blk + "\n")
+                span = _extract_def_block(tmp, name)
+                if span:
+                    candidate_replacement = _safe_replace_first(tmp, span, "\n" + blk + "\n")
                     if _parse_ok(candidate_replacement):
                         tmp = candidate_replacement
                         changed = True
-                        logger.info(f"merge_llm_result: full-function rewrite replaced '{name}' successfully")
+                        logger.info("merge_llm_result: full-function rewrite replaced '%s' successfully", name)
             if changed and _parse_ok(tmp):
                 # Final hallucination checks
-                base_names = set(_top_level_names(base))
-                tmp_names = set(_top_level_names(tmp))
+                base_names, base_imports = _summary(base)
+                tmp_names, tmp_imports = _summary(tmp)
                 added = tmp_names - base_names
-                base_imports = set(_imports_from_code(base))
-                tmp_imports = set(_imports_from_code(tmp))
                 new_imports = tmp_imports - base_imports
                 if len(added) > MAX_ADDED_TOPLEVEL_DEFS or len(new_imports) > MAX_ADDED_IMPORTS:
                     logger.warning("merge_llm_result: rejecting full-function rewrite due to excessive additions")
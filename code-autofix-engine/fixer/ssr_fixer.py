@@ -28,8 +28,11 @@ Notes:
 from __future__ import annotations
 
 import ast
+import functools
+import itertools
 import logging
 import re
+import string
 from typing import List, Tuple, Optional
 
 logger = logging.getLogger("repair_system.ssr")
@@ -48,8 +51,23 @@ logger.setLevel(logging.INFO)
 OPENERS = {"[": "]", "(": ")", "{": "}"}
 CLOSERS = {v: k for k, v in OPENERS.items()}
 
+# first characters of a bare identifier / literal statement (hot: checked per candidate line)
+_STARTERS = frozenset(string.ascii_letters + string.digits + "_'\"`")
 
+# comments and string literals, removed before bracket counting so brackets inside them
+# are skipped; unterminated strings run to end of line (triple-quoted: end of file).
+_STRING_OR_COMMENT_RE = re.compile(
+    r"""\#[^\n]*"""
+    r"""|'''[\s\S]*?(?:'''|\Z)|\"\"\"[\s\S]*?(?:\"\"\"|\Z)"""
+    r"""|'(?:[^'\\\n]|\\[\s\S])*(?:'|$)|"(?:[^"\\\n]|\\[\s\S])*(?:"|$)""",
+    re.MULTILINE,
+)
+_NON_BRACKET_RE = re.compile(r"[^()\[\]{}]+")
+
+
+@functools.lru_cache(maxsize=64)
 def _safe_parse(code: str) -> bool:
+    """Whether code parses; memoized since attempts re-check the same texts."""
     try:
         ast.parse(code)
         return True
@@ -87,21 +105,11 @@ def _line_is_likely_statement_start(line: str) -> bool:
     e.g., 'print(', 'for ', 'if ', 'return ', 'x =', an identifier, etc.
     This helps us decide to split the next line out of the literal.
     """
-    s = line.lstrip()
-    if not s:
-        return False
-    keywords = ("def ", "class ", "for ", "if ", "while ", "try:", "with ", "return ", "import ", "from ", "print(", "print ")
-    if s.startswith(keywords):
-        return True
-    # simple assignment or function call
-    if re.match(r"[A-Za-z_][A-Za-z0-9_]*\s*=", s):
-        return True
-    if re.match(r"[A-Za-z_][A-Za-z0-9_]*\s*\(", s):  # foo(...
-        return True
-    # bare identifier / literal — also often statement start
-    if re.match(r"^[A-Za-z_0-9'\"`]", s):
-        return True
-    return False
+    # Keywords (def, class, for, if, while, try:, with, return, import, from, print),
+    # simple assignments (x =), calls (foo(...) and bare identifiers / literals all
+    # begin with a char in _STARTERS, so the first non-blank char decides alone.
+    i = _indent(line)
+    return i < len(line) and line[i] in _STARTERS
 
 
 # ---------------------------
@@ -126,6 +134,15 @@ def _close_opener_on_line(line: str, opener_idx: int, opener_char: str) -> str:
         return line.rstrip() + closer
 
 
+def _indent(line: str) -> int:
+    """len(line) - len(line.lstrip()) without building the stripped copy."""
+    i = 0
+    n = len(line)
+    while i < n and line[i].isspace():
+        i += 1
+    return i
+
+
 def _dedent_line(line: str, indent_to_remove: int) -> str:
     """
     Remove up to indent_to_remove spaces from the start of the line (not tabs).
@@ -156,7 +173,7 @@ def _split_out_of_literal(lines: List[str], start_idx: int) -> List[str]:
     opener_idx, opener_char = opener_info
     closer = OPENERS[opener_char]
 
-    logger.debug(f"SSR: Found unclosed opener '{opener_char}' on line {start_idx}: '{start_line.strip()}'")
+    logger.debug("SSR: Found unclosed opener '%s' on line %d: '%s'", opener_char, start_idx, start_line.strip())
 
     # 1) Close opener on the same line
     new_start = _close_opener_on_line(start_line, opener_idx, opener_char)
@@ -166,13 +183,13 @@ def _split_out_of_literal(lines: List[str], start_idx: int) -> List[str]:
     if start_idx + 1 < len(new_lines):
         next_line = new_lines[start_idx + 1]
         # Compute base indent of start line
-        base_indent = len(start_line) - len(start_line.lstrip())
+        base_indent = _indent(start_line)
         # If next_line indent <= base_indent OR next_line looks like a statement start, dedent it
-        if (len(next_line) - len(next_line.lstrip()) <= base_indent) or _line_is_likely_statement_start(next_line):
+        if (_indent(next_line) <= base_indent) or _line_is_likely_statement_start(next_line):
             # remove base_indent spaces if present, else remove up to 4 spaces
             remove = base_indent if base_indent > 0 else 4
             new_lines[start_idx + 1] = _dedent_line(next_line, remove)
-            logger.debug(f"SSR: Dedented line {start_idx+1} by {remove} spaces.")
+            logger.debug("SSR: Dedented line %d by %d spaces.", start_idx + 1, remove)
     return new_lines
 
 
@@ -184,6 +201,8 @@ def _find_last_openers(lines: List[str]) -> List[Tuple[int, int, str]]:
     """
     results = []
     for idx, ln in enumerate(lines):
+        if "(" not in ln and "[" not in ln and "{" not in ln:
+            continue
         res = _first_unclosed_opener_in_line(ln)
         if res:
             opener_pos, opener_char = res
@@ -191,6 +210,11 @@ def _find_last_openers(lines: List[str]) -> List[Tuple[int, int, str]]:
     return results
 
 
+def _line_offsets(lines: List[str]) -> List[int]:
+    """Start offset of each line in "\n".join(lines), plus one past the end."""
+    return [0, *itertools.accumulate(len(ln) + 1 for ln in lines)]
+
+
 # ---------------------------
 # High-level API
 # ---------------------------
@@ -213,11 +237,21 @@ def apply_ssr_fix(code: str, max_attempts: int = 4) -> str:
     working = code.replace("\r\n", "\n")
     if _safe_parse(working):
         return working
+    if not any(op in working for op in OPENERS):
+        # no bracket to close anywhere: nothing below can change the code
+        logger.warning("SSR: unable to fully repair; returning best-effort result.")
+        return working
 
     lines = working.split("\n")
+    # `current` is always "\n".join(lines); offsets[k] is where line k starts in it
+    # (offsets[len(lines)] is one past the end), so a candidate is spliced in
+    # instead of re-joining every line for every opener tried.
+    current = working
+    offsets = _line_offsets(lines)
+    old_unmatched = None
 
     for attempt in range(max_attempts):
-        logger.debug(f"SSR attempt {attempt+1}/{max_attempts}")
+        logger.debug("SSR attempt %d/%d", attempt + 1, max_attempts)
 
         openers = _find_last_openers(lines)
         if not openers:
@@ -232,21 +266,29 @@ def apply_ssr_fix(code: str, max_attempts: int = 4) -> str:
         for (line_idx, op_pos, op_char) in openers:
             # Try to close this opener and dedent next line(s)
             candidate_lines = _split_out_of_literal(lines, line_idx)
-            candidate_code = "\n".join(candidate_lines)
-            if candidate_code != "\n".join(lines):
+            # only lines line_idx and line_idx + 1 can differ
+            hi = min(line_idx + 2, len(lines))
+            if candidate_lines[line_idx:hi] != lines[line_idx:hi]:
+                candidate_code = (current[:offsets[line_idx]]
+                                  + "\n".join(candidate_lines[line_idx:hi])
+                                  + current[offsets[hi] - 1:])
                 # test parse
                 if _safe_parse(candidate_code):
-                    logger.info(f"SSR: fixed by closing opener on line {line_idx+1}")
+                    logger.info("SSR: fixed by closing opener on line %d", line_idx + 1)
                     return candidate_code
                 # Keep the change if it reduces syntax errors heuristically:
                 # Compare lengths of parser exception messages? To keep simple, accept the change if it didn't make parse worse:
                 # We'll check by trying a second stage healing: if parse still fails, but change reduced the number of total unbalanced openers,
                 # we accept and continue iterating.
-                old_unmatched = _count_unmatched_openers("\n".join(lines))
+                if old_unmatched is None:
+                    old_unmatched = _count_unmatched_openers(current)
                 new_unmatched = _count_unmatched_openers(candidate_code)
                 if new_unmatched < old_unmatched:
                     logger.debug("SSR: change reduced unmatched openers; accepting provisional change and continuing.")
                     lines = candidate_lines
+                    current = candidate_code
+                    offsets = _line_offsets(lines)
+                    old_unmatched = new_unmatched
                     changed = True
                     break
                 else:
@@ -255,61 +297,60 @@ def apply_ssr_fix(code: str, max_attempts: int = 4) -> str:
                     continue
 
         if not changed:
-            # If none of the single-opener attempts improved the unmatched count, try a combined conservative closure:
-            combined = _close_all_openers_conservatively("\n".join(lines))
-            if combined != "\n".join(lines) and _safe_parse(combined):
-                logger.info("SSR: fixed by conservative all-opener closure.")
-                return combined
-            # else give up on further attempts
+            # None of the single-opener attempts improved the unmatched count: give up on
+            # further attempts and go straight to the combined conservative closure below
+            # (trying it here as well would only rebuild and re-parse the same text).
             break
 
     # Final attempt: try small aggressive close-all then syntax healers (but keep conservative)
-    final_try = _close_all_openers_conservatively("\n".join(lines))
-    if final_try != "\n".join(lines) and _safe_parse(final_try):
-        logger.info("SSR: final conservative closure succeeded.")
+    final_try = _close_all_openers_conservatively(current)
+    if final_try != current and _safe_parse(final_try):
+        logger.info("SSR: fixed by conservative all-opener closure.")
         return final_try
 
     logger.warning("SSR: unable to fully repair; returning best-effort result.")
-    return "\n".join(lines)
+    return current
 
 
 # ---------------------------
 # Helper heuristics used above
 # ---------------------------
 
-def _count_unmatched_openers(code: str) -> int:
+@functools.lru_cache(maxsize=64)
+def _unmatched_closers(code: str) -> Tuple[str, ...]:
     """
-    Count unmatched openers across the whole code (naive stack approach).
-    Lower is better.
+    Closers still owed at the end of code, innermost last (naive stack approach).
+    Strings and comments are skipped; unmatched closers are ignored.
+    Memoized: the text whose count admitted a provisional change is the one the
+    conservative closure later scans again.
     """
+    if "'" in code or '"' in code or "#" in code:
+        code = _STRING_OR_COMMENT_RE.sub("", code)
+    brackets = _NON_BRACKET_RE.sub("", code)
+    # An adjacent matched pair is pushed and popped straight away, so deleting it
+    # leaves the final stack unchanged; str.replace does that in C, one nesting
+    # level per round, and only the (short) unmatched residue is left to walk.
+    while True:
+        n = len(brackets)
+        brackets = brackets.replace("()", "").replace("[]", "").replace("{}", "")
+        if len(brackets) == n:
+            break
     stack = []
-    in_single = False
-    in_double = False
-    escaped = False
-    for ch in code:
-        if ch == "\\" and not escaped:
-            escaped = True
-            continue
-        if ch == "'" and not escaped and not in_double:
-            in_single = not in_single
-            continue
-        if ch == '"' and not escaped and not in_single:
-            in_double = not in_double
-            continue
-        if in_single or in_double:
-            escaped = False
-            continue
+    for ch in brackets:
+        closer = OPENERS.get(ch)
+        if closer:
+            stack.append(closer)
+        elif stack and stack[-1] == ch:
+            stack.pop()
+    return tuple(stack)
 
-        if ch in OPENERS:
-            stack.append(OPENERS[ch])
-        elif ch in OPENERS.values():
-            if stack and stack[-1] == ch:
-                stack.pop()
-            else:
-                # unmatched closer - ignore
-                pass
-        escaped = False
-    return len(stack)
+
+def _count_unmatched_openers(code: str) -> int:
+    """
+    Count unmatched openers across the whole code.
+    Lower is better.
+    """
+    return len(_unmatched_closers(code))
 
 
 def _close_all_openers_conservatively(code: str) -> str:
@@ -317,37 +358,10 @@ def _close_all_openers_conservatively(code: str) -> str:
     Append all unmatched closers to the end of the file in the reverse-order they were opened.
     Conservative but might fix many multiline literal cases.
     """
-    stack = []
-    in_single = False
-    in_double = False
-    escaped = False
-    for ch in code:
-        if ch == "\\" and not escaped:
-            escaped = True
-            continue
-        if ch == "'" and not escaped and not in_double:
-            in_single = not in_single
-            continue
-        if ch == '"' and not escaped and not in_single:
-            in_double = not in_double
-            continue
-        if in_single or in_double:
-            escaped = False
-            continue
-
-        if ch in OPENERS:
-            stack.append(OPENERS[ch])
-        elif ch in OPENERS.values():
-            if stack and stack[-1] == ch:
-                stack.pop()
-            else:
-                # unmatched closer - ignore
-                pass
-        escaped = False
-
+    stack = _unmatched_closers(code)
     if not stack:
         return code
     add = "".join(reversed(stack))
-    logger.debug(f"SSR: conservative append of closers: {add}")
+    logger.debug("SSR: conservative append of closers: %s", add)
     # Append at end on its own line to avoid inline comment collisions
     return code.rstrip() + ("\n" if not code.endswith("\n") else "") + add + "\n"
\ No newline at end of file
@@ -12,7 +12,10 @@ Upgrades:
  - Guaranteed diff fallback for unbreakable loops
 """
 
+import ast
 import difflib
+import functools
+import itertools
 import re
 from typing import Optional, List
 
@@ -20,7 +23,7 @@ from runtime.sandbox_runner import run_in_sandbox
 
 from errors.error_types import ErrorType
 from errors.error_parser import parse_error
-from errors.error_classifier import choose_fix_method
+from errors.error_classifier import FixMethod, choose_fix_method
 
 from fixer.ast_fixer import try_ast_fix
 from fixer.llm_fixer import generate_llm_fix
@@ -28,11 +31,14 @@ from fixer.merge_strategy import merge_llm_result
 from fixer.ssr_fixer import apply_ssr_fix
 from fixer.logical_detector import inspect_and_test
 
+from utils.regex_engine import compile_pattern
 from utils.validation import validate_iteration
 from utils.logger import log_step, setup_logger
 from utils.timers import timer
 
-from iterations.iteration_report import create_iteration_report, save_full_report
+from iterations.iteration_report import (
+    ChangeRecord, ReportSpool, SnapshotReportSpool, create_iteration_report, save_full_report,
+)
 
 from config.settings import MAX_ITERATIONS, MODEL_MAX_TOKENS
 
@@ -51,25 +57,30 @@ def normalize_code(s: Optional[str]) -> str:
 # ==========================================================
 # Extract Python code from LLM output
 # ==========================================================
+# compiled once (RE2 when available); applied to every LLM response
+_FENCE_RE = compile_pattern(r"(?si)```(?:python)?\s*(.*?)```")
+_INDENTED_BLOCK_RE = compile_pattern(r"(?:\n(?: {4}|\t).+)+")
+_INDENT_PREFIX_RE = compile_pattern(r"^( {4}|\t)")
+_CODE_HINT_RE = compile_pattern(r"(def |class |=|\()")
+
+
 def extract_code_from_llm(llm: str) -> str:
     if not llm:
         return ""
 
-    # ```python fenced
-    m = re.findall(r"```(?:python)?\s*(.*?)```", llm, re.DOTALL | re.IGNORECASE)
-    if m:
-        return m[-1].strip()
-
-    # raw fenced
-    m = re.findall(r"```(.*?)```", llm, re.DOTALL)
-    if m:
-        return m[-1].strip()
+    # fenced (```python or bare ```): keep the last block. A bare fence needs no
+    # second pattern — the optional "python" already covers it.
+    last = None
+    for last in _FENCE_RE.finditer(llm):
+        pass
+    if last is not None:
+        return last.group(1).strip()
 
     # indented block
-    indented_blocks = re.findall(r"(?:\n(?: {4}|\t).+)+", "\n" + llm)
+    indented_blocks = _INDENTED_BLOCK_RE.findall("\n" + llm)
     if indented_blocks:
         block = max(indented_blocks, key=len)
-        lines = [re.sub(r"^( {4}|\t)", "", ln) for ln in block.splitlines()]
+        lines = [_INDENT_PREFIX_RE.sub("", ln) for ln in block.splitlines()]
         return "\n".join(lines).strip()
 
     # last 40 lines heuristic
@@ -77,10 +88,10 @@ def extract_code_from_llm(llm: str) -> str:
     if not lines:
         return ""
 
+    # smallest tail window holding a code-looking line (the hints never span lines)
     for window in range(1, min(40, len(lines)) + 1):
-        candidate = "\n".join(lines[-window:])
-        if re.search(r"(def |class |=|\()", candidate):
-            return candidate.strip()
+        if _CODE_HINT_RE.search(lines[-window]):
+            return "\n".join(lines[-window:]).strip()
 
     return "\n".join(lines[-40:]).strip()
 
@@ -99,47 +110,95 @@ def ensure_diff(old_code: str, new_code: str, iteration: int) -> str:
 # INSTANT SEMANTIC INTENT DETECTION
 # (Detect silent logical bugs before iteration 0)
 # ==========================================================
+# rule triggers ("def preorder", "def fib", ... as case-insensitive substrings of the source)
+_SEMANTIC_TRIGGER_RE = re.compile(r"def (preorder|inorder|postorder|fib|binary_search|binarysearch)", re.IGNORECASE)
+# rule patterns, compiled once; case-insensitive so the source never needs lowercasing.
+# The traversal rules are "these pieces appear in this order" (the old DOTALL `a.*b.*c`
+# patterns); they are matched by _in_order, a linear scan, since a chain of DOTALL `.*`
+# backtracks polynomially on long files that contain the pieces but not the order.
+_PREORDER_CALL_RE = re.compile(r"preorder\s*\(", re.IGNORECASE)
+_LEFT_RE = re.compile(r"left", re.IGNORECASE)
+_RIGHT_RE = re.compile(r"right", re.IGNORECASE)
+_APPEND_RE = re.compile(r"append", re.IGNORECASE)
+_CLOSE_PAREN_RE = re.compile(r"\)")
+# preorder\s*\(.*left.*\).*preorder\s*\(.*right.*\).*append
+_PREORDER_APPEND_LAST = (
+    _PREORDER_CALL_RE, _LEFT_RE, _CLOSE_PAREN_RE, _PREORDER_CALL_RE, _RIGHT_RE, _CLOSE_PAREN_RE, _APPEND_RE,
+)
+# preorder\s*\(.*left.*\).*append.*preorder\s*\(.*right.*\)
+_PREORDER_APPEND_MIDDLE = (
+    _PREORDER_CALL_RE, _LEFT_RE, _CLOSE_PAREN_RE, _APPEND_RE, _PREORDER_CALL_RE, _RIGHT_RE, _CLOSE_PAREN_RE,
+)
+# left.*append.*right
+_INORDER = (_LEFT_RE, _APPEND_RE, _RIGHT_RE)
+_POSTORDER_RE = re.compile(r"append.*(left|right)", re.IGNORECASE)
+_MEMO_RE = re.compile(r"memo", re.IGNORECASE)
+_MEMO0_RETURN_RE = re.compile(r"return memo\[0\]", re.IGNORECASE)
+_MID_ASSIGN_RE = re.compile(r"mid =", re.IGNORECASE)
+_BS_FLOAT_MID_RE = re.compile(r"mid\s*=\s*\(?.*left.*\+.*right.*\)?\s*/\s*2", re.IGNORECASE)
+_BS_LEFT_MID_RE = re.compile(r"left\s*=\s*mid\s*(?!\+|\-)", re.IGNORECASE)
+_BS_RIGHT_MID_RE = re.compile(r"right\s*=\s*mid\s*(?!\+|\-)", re.IGNORECASE)
+
+
+def _in_order(code: str, pieces) -> bool:
+    """
+    True if the pieces occur in order without overlapping, i.e. `p1.*p2.*...` matches
+    under DOTALL. Taking the earliest occurrence of each piece after the previous one
+    is never worse than a later one, so one forward pass decides it.
+    """
+    pos = 0
+    for piece in pieces:
+        m = piece.search(code, pos)
+        if m is None:
+            return False
+        pos = m.end()
+    return True
+
+
 def detect_semantic_conflicts(code: str) -> bool:
-    c = code.lower()
+    # one sweep for every rule trigger; code defining none of these (the common case) is done
+    triggers = {t.lower() for t in _SEMANTIC_TRIGGER_RE.findall(code)}
+    if not triggers:
+        return False
 
     # ----- traversal bugs ------
     # preorder should be N L R → append BEFORE left recursion
-    if "def preorder" in c:
+    if "preorder" in triggers:
         # simple heuristic: if append occurs after left recursion, that's reversed order
-        if re.search(r"preorder\s*\(.*left.*\).*preorder\s*\(.*right.*\).*append", c, re.DOTALL):
+        if _in_order(code, _PREORDER_APPEND_LAST):
             return True
         # another heuristic: append occurs between left and right? still suspicious
-        if re.search(r"preorder\s*\(.*left.*\).*append.*preorder\s*\(.*right.*\)", c, re.DOTALL):
+        if _in_order(code, _PREORDER_APPEND_MIDDLE):
             # this indicates append after left, which is fine for inorder/postorder checking,
             # but we're conservative and treat odd patterns as conflict for the tool to fix.
             return True
 
     # inorder must be L N R (we flag obvious deviations)
-    if "def inorder" in c:
-        if not re.search(r"left.*append.*right", c, re.DOTALL):
+    if "inorder" in triggers:
+        if not _in_order(code, _INORDER):
             return True
 
     # postorder must be L R N (append must be last)
-    if "def postorder" in c:
-        if re.search(r"append.*(left|right)", c):
+    if "postorder" in triggers:
+        if _POSTORDER_RE.search(code):
             return True
 
     # ----- fibonacci memo bug -----
-    if "def fib" in c and "memo" in c:
-        if "return memo[0]" in c:
+    if "fib" in triggers and _MEMO_RE.search(code):
+        if _MEMO0_RETURN_RE.search(code):
             return True
 
     # ----- binary search bugs -----
-    if "def binary_search" in c or "def binarysearch" in c:
+    if "binary_search" in triggers or "binarysearch" in triggers:
         # mid calculation must be correct (a heuristic)
-        if "mid =" in c and "//" not in c and "+" in c:
+        if _MID_ASSIGN_RE.search(code) and "//" not in code and "+" in code:
             # often mid=(left+right)//2 — if they used (left+right)/2 without integer division, we flag
-            if re.search(r"mid\s*=\s*\(?.*left.*\+.*right.*\)?\s*/\s*2", c):
+            if _BS_FLOAT_MID_RE.search(code):
                 return True
         # left pointer must advance by mid+1 or mid depending on implementation — detect suspicious assignments
-        if re.search(r"left\s*=\s*mid\s*(?!\+|\-)", c):
+        if _BS_LEFT_MID_RE.search(code):
             return True
-        if re.search(r"right\s*=\s*mid\s*(?!\+|\-)", c):
+        if _BS_RIGHT_MID_RE.search(code):
             return True
 
     return False
@@ -148,47 +207,33 @@ def detect_semantic_conflicts(code: str) -> bool:
 # ==========================================================
 # DIFF TRACKER
 # ==========================================================
-def compute_changes(old_code, new_code, iteration, method, err_type):
-    changes = []
-    diff = difflib.ndiff(old_code.splitlines(), new_code.splitlines())
+@functools.lru_cache(maxsize=8)
+def _code_lines(code: str) -> tuple:
+    # one iteration's new_code is usually the next one's old_code; split it once
+    return tuple(code.splitlines())
 
-    old_ln = 0
-    new_ln = 0
 
-    for row in diff:
-        tag = row[:2]
-        text = row[2:]
-
-        if tag == "  ":
-            old_ln += 1
-            new_ln += 1
+def compute_changes(old_code, new_code, iteration, method, err_type):
+    changes = []
+    old_lines = _code_lines(old_code)
+    new_lines = _code_lines(new_code)
+    err = str(err_type)
+    # opcodes give the changed line ranges directly; a replaced block is reported as its
+    # removed lines followed by its added lines
+    sm = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    # n=0: only the change groups, no context lines around them
+    for tag, i1, i2, j1, j2 in itertools.chain.from_iterable(sm.get_grouped_opcodes(0)):
+        if tag == "equal":
             continue
-        if tag == "- ":
-            old_ln += 1
-            changes.append({
-                "iteration": iteration,
-                "fix_method": method,
-                "error_type": str(err_type),
-                "change_type": "removed",
-                "line_old": old_ln,
-                "line_new": None,
-                "old_text": text,
-                "new_text": "",
-                "reason": "Removed"
-            })
-        if tag == "+ ":
-            new_ln += 1
-            changes.append({
-                "iteration": iteration,
-                "fix_method": method,
-                "error_type": str(err_type),
-                "change_type": "added",
-                "line_old": None,
-                "line_new": new_ln,
-                "old_text": "",
-                "new_text": text,
-                "reason": "Added"
-            })
+        for old_ln in range(i1 + 1, i2 + 1):
+            changes.append(ChangeRecord(
+                iteration, method, err, "removed", old_ln, None, old_lines[old_ln - 1], "", "Removed"
+            ))
+        for new_ln in range(j1 + 1, j2 + 1):
+            changes.append(ChangeRecord(
+                iteration, method, err, "added", None, new_ln, "", new_lines[new_ln - 1], "Added"
+            ))
     return changes
 
 
@@ -198,8 +243,6 @@ def compute_changes(old_code, new_code, iteration, method, err_type):
 def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int = None):
 
     code = original_code
-    iteration_reports = []
-    changeLog = []
     max_iter = max_iterations or MAX_ITERATIONS
 
     # ================================================
@@ -220,20 +263,20 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
 
         merged_candidate = None
         changeLog = []   # <<------------------- ADDED HERE
+        orig_norm = normalize_code(original_code)
 
         try:
             merged_candidate = merge_llm_result(original_code, llm_raw, allow_full_rewrite=True)
-            if merged_candidate and normalize_code(merged_candidate) != normalize_code(original_code):
+            if merged_candidate and normalize_code(merged_candidate) != orig_norm:
                 new_code = merged_candidate
             else:
                 if extracted:
                     merged_from_extracted = merge_llm_result(original_code, extracted, allow_full_rewrite=True)
-                    if merged_from_extracted and normalize_code(merged_from_extracted) != normalize_code(original_code):
+                    if merged_from_extracted and normalize_code(merged_from_extracted) != orig_norm:
                         new_code = merged_from_extracted
                     else:
                         # fallback to extracted full file if parsed
                         try:
-                            import ast
                             ast.parse(extracted)
                             new_code = extracted
                         except Exception:
@@ -255,7 +298,7 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
             old_code=original_code,
             new_code=new_code,
             iteration=0,
-            method="LLM",
+            method=FixMethod.LLM,
             err_type="SEMANTIC"
         )
 
@@ -267,7 +310,7 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
             code=new_code,
             stdout="",
             stderr="",
-            fix_method="LLM",
+            fix_method=FixMethod.LLM,
             error_type="SEMANTIC",
             success=True,
         )
@@ -280,40 +323,48 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
     # ========================
     # NORMAL ITERATION LOOP
     # ========================
+    # reports and changes go to disk as they are produced, not into ever-growing lists
+    iteration_reports = SnapshotReportSpool()
+    changeLog = ReportSpool()
+    # an iteration starts by running and inspecting the code the previous one just validated
+    sandbox_results = {}
+    inspect_results = {}
+    ssr_results = {}
+
     for i in range(1, max_iter + 1):
         log_step(f"\n=== ITERATION {i} ===")
 
         # RUN ORIGINAL
         with timer(f"iteration_{i}"):
-            stdout, stderr = run_in_sandbox(code)
+            stdout, stderr = _once(sandbox_results, run_in_sandbox, code)
 
         iteration_start_output = stdout or ""
 
         runtime_error, full_err = parse_error(stderr, code)
-        logic_info = inspect_and_test(code)
+        logic_info = _once(inspect_results, inspect_and_test, code)
         logic_issues = logic_info.get("issues", [])
 
-        error_type = ErrorType.LOGICAL if logic_issues else runtime_error
+        error_type = ErrorType.LOGICAL if _blocking_issues(logic_issues) else runtime_error
 
         # SUCCESS IF NO ERROR AND NO USER REQUEST
         if error_type == ErrorType.NONE and not user_prompt.strip():
             iteration_reports.append(create_iteration_report(
                 iteration=i, code=code, stdout=stdout, stderr=stderr,
-                fix_method="NONE", error_type=error_type, success=True
+                fix_method=FixMethod.NONE, error_type=error_type, success=True
             ))
-            path = save_full_report(iteration_reports, changeLog, "SUCCESS")
+            path = _finish_report(iteration_reports, changeLog, "SUCCESS")
             return code, path
 
         # SELECT FIX METHOD
         if user_prompt.strip():
-            method = "LLM"
+            method = FixMethod.LLM
         elif error_type == ErrorType.LOGICAL:
-            method = "LLM"
+            method = FixMethod.LLM
         else:
             method = choose_fix_method(error_type)
 
         # PRE-FIX SSR
-        code = apply_ssr_fix(code)
+        code = _once(ssr_results, apply_ssr_fix, code)
 
         # LOGIC PATCHES
         if error_type == ErrorType.LOGICAL:
@@ -322,23 +373,26 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
         old_code = code
         new_code = code
         applied_method = method
+        # new_code only moves away from old_code once a fix is accepted, so every
+        # "did this candidate change anything" check below compares against this
+        old_norm = normalize_code(old_code)
 
         # ================
         # APPLY FIX
         # ================
-        if method == "AST":
+        if method == FixMethod.AST:
             try:
                 patched = try_ast_fix(error_type, new_code)
-                if normalize_code(patched) != normalize_code(new_code):
+                if normalize_code(patched) != old_norm:
                     new_code = patched
                 else:
                     log_step("[INFO] AST produced no effective change → fallback to LLM")
-                    method = "LLM"
+                    method = FixMethod.LLM
             except Exception as e:
                 log_step(f"[ERROR] AST fixer crashed: {e}")
-                method = "LLM"
+                method = FixMethod.LLM
 
-        if method == "LLM":
+        if method == FixMethod.LLM:
             llm_raw = generate_llm_fix(
                 code=new_code,
                 error_message=full_err,
@@ -351,41 +405,40 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
             merged = merge_llm_result(new_code, llm_raw, allow_full_rewrite=False)
             extracted = extract_code_from_llm(llm_raw)
 
-            if normalize_code(merged) != normalize_code(new_code):
+            if normalize_code(merged) != old_norm:
                 new_code = merged
-                applied_method = "LLM"
-            elif extracted and normalize_code(extracted) != normalize_code(new_code):
+                applied_method = FixMethod.LLM
+            elif extracted and normalize_code(extracted) != old_norm:
                 # try merging the extracted snippet into the full file
                 merged_from_extracted = merge_llm_result(new_code, extracted, allow_full_rewrite=True)
-                if normalize_code(merged_from_extracted) != normalize_code(new_code):
+                if normalize_code(merged_from_extracted) != old_norm:
                     new_code = merged_from_extracted
-                    applied_method = "LLM"
+                    applied_method = FixMethod.LLM
                 else:
                     # fallback: use extracted if it's a plausible full-file candidate
                     try:
-                        import ast
                         ast.parse(extracted)
                         # prefer to return merged original + extracted replaced where possible:
                         merged_try = merge_llm_result(new_code, extracted, allow_full_rewrite=True)
-                        if normalize_code(merged_try) != normalize_code(new_code):
+                        if normalize_code(merged_try) != old_norm:
                             new_code = merged_try
-                            applied_method = "LLM"
+                            applied_method = FixMethod.LLM
                         else:
                             new_code = ensure_diff(old_code, old_code, i)
-                            applied_method = "LLM"
+                            applied_method = FixMethod.LLM
                     except Exception:
                         new_code = ensure_diff(old_code, old_code, i)
-                        applied_method = "LLM"
+                        applied_method = FixMethod.LLM
             else:
                 # no-op merged result — force a guaranteed diff so loop can progress
                 new_code = ensure_diff(old_code, old_code, i)
-                applied_method = "LLM"
+                applied_method = FixMethod.LLM
 
         # POST-FIX SSR
-        new_code = apply_ssr_fix(new_code)
+        new_code = _once(ssr_results, apply_ssr_fix, new_code)
 
-        # DIFF TRACKING
-        if normalize_code(new_code) != normalize_code(old_code):
+        # DIFF TRACKING (plain equality first: an unchanged string needs no normalizing)
+        if new_code != old_code and normalize_code(new_code) != old_norm:
             diffs = compute_changes(old_code, new_code, i, applied_method, error_type)
             if diffs:
                 try:
@@ -395,14 +448,14 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
                         changeLog.append(d)
 
         # VALIDATION
-        val_stdout, val_stderr = run_in_sandbox(new_code)
+        val_stdout, val_stderr = _once(sandbox_results, run_in_sandbox, new_code)
         new_err, _ = parse_error(val_stderr, new_code)
 
         # output-change detection
         if (val_stdout or "") != iteration_start_output:
             new_err = ErrorType.LOGICAL
 
-        if inspect_and_test(new_code).get("issues", []):
+        if _blocking_issues(_once(inspect_results, inspect_and_test, new_code).get("issues", [])):
             new_err = ErrorType.LOGICAL
 
         success, _ = validate_iteration(val_stdout, val_stderr, new_err)
@@ -417,19 +470,56 @@ def run_repair_loop(original_code: str, user_prompt: str, max_iterations: int =
             success=success,
         ))
 
-        if applied_method == "LLM" and new_err == ErrorType.NONE:
-            path = save_full_report(iteration_reports, changeLog, "SUCCESS")
+        if applied_method == FixMethod.LLM and new_err == ErrorType.NONE:
+            path = _finish_report(iteration_reports, changeLog, "SUCCESS")
             return new_code, path
 
         code = new_code
 
-    path = save_full_report(iteration_reports, changeLog, "FAILED")
+    path = _finish_report(iteration_reports, changeLog, "FAILED")
     return code, path
 
 
+_ONCE_CACHE_MAX = 8
+
+
+def _once(cache: dict, fn, code: str):
+    """fn(code), reusing the result if this exact code already went through fn in this loop."""
+    res = cache.get(code)
+    if res is None:
+        if len(cache) >= _ONCE_CACHE_MAX:
+            cache.pop(next(iter(cache)))
+        res = cache[code] = fn(code)
+    return res
+
+
+def _finish_report(iteration_reports: ReportSpool, change_log: ReportSpool, final_status: str) -> str:
+    try:
+        return save_full_report(iteration_reports, change_log, final_status)
+    finally:
+        iteration_reports.close()
+        change_log.close()
+
+
 # ==========================================================
 # INTERNAL logical patch wrapper
 # ==========================================================
+# Heuristic findings that are reported, and passed to the LLM when it runs, but
+# that are not bugs on their own: a correct loop may well index x[i + 1], and
+# `id = 5` is legal Python.
+_ADVISORY_ISSUES = frozenset({"OFF_BY_ONE_INDEX", "SHADOW_BUILTIN"})
+
+
+def _blocking_issues(issues: List[dict]) -> List[dict]:
+    """The issues that make the code count as logically broken."""
+    return [issue for issue in issues if issue.get("issue_type") not in _ADVISORY_ISSUES]
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled_patch_pattern(pattern: str) -> "re.Pattern":
+    return re.compile(pattern)
+
+
 def _apply_logical_patches(code: str, issues: List[dict]) -> str:
     patched = code
     for issue in issues:
@@ -438,7 +528,7 @@ def _apply_logical_patches(code: str, issues: List[dict]) -> str:
             continue
         if p.get("kind") == "text_replace":
             try:
-                patched = re.sub(p["pattern"], p["replacement"], patched)
+                patched = _compiled_patch_pattern(p["pattern"]).sub(p["replacement"], patched)
             except Exception:
                 pass
     return patched
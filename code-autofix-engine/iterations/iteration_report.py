@@ -1,7 +1,18 @@
 # iterations/iteration_report.py
-import json
+import hashlib
+import shutil
+import tempfile
+from collections import namedtuple
 from datetime import datetime
 
+import orjson
+
+# One line-level change; fields in the order they appear in the saved JSON report.
+ChangeRecord = namedtuple(
+    "ChangeRecord",
+    "iteration fix_method error_type change_type line_old line_new old_text new_text reason",
+)
+
 def create_iteration_report(iteration, code, stdout, stderr, fix_method, error_type=None, success=False, exec_time=None):
     """
     Creates a structured JSON-friendly report for each iteration.
@@ -15,6 +26,9 @@ def create_iteration_report(iteration, code, stdout, stderr, fix_method, error_t
     - error_type (str, optional): detected error type
     - success (bool, optional): whether code ran successfully this iteration
     - exec_time (float, optional): execution duration in seconds
+
+    code_hash identifies the snapshot; SnapshotReportSpool uses it to write each
+    distinct code_snapshot only once per report.
     """
     return {
         "iteration": iteration,
@@ -25,28 +39,93 @@ def create_iteration_report(iteration, code, stdout, stderr, fix_method, error_t
         "execution_time": exec_time,
         "stdout": stdout,
         "stderr": stderr,
+        "code_hash": hashlib.blake2b((code or "").encode("utf-8", "surrogatepass"), digest_size=16).hexdigest(),
         "code_snapshot": code
     }
 
 
+class ReportSpool:
+    """
+    Append-only list of report entries (iteration reports or change records) that is
+    serialized as it grows into an anonymous temp file instead of being held in memory.
+    save_full_report copies the spooled JSON straight into the report.
+    """
+
+    def __init__(self):
+        self._f = tempfile.TemporaryFile("w+b")
+        self._count = 0
+
+    def append(self, item):
+        if self._count:
+            self._f.write(b",")
+        self._f.write(orjson.dumps(item._asdict() if isinstance(item, ChangeRecord) else item))
+        self._count += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return self._count
+
+    def copy_to(self, out):
+        self._f.seek(0)
+        shutil.copyfileobj(self._f, out)
+        self._f.seek(0, 2)
+
+    def close(self):
+        self._f.close()
+
+
+class SnapshotReportSpool(ReportSpool):
+    """
+    ReportSpool for iteration reports. A report whose code_hash was already spooled is
+    written without its code_snapshot; the body appears once, in the first report with
+    that hash.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._seen = set()
+
+    def append(self, item):
+        code_hash = item.get("code_hash")
+        if code_hash is not None:
+            if code_hash in self._seen:
+                item = {k: v for k, v in item.items() if k != "code_snapshot"}
+            else:
+                self._seen.add(code_hash)
+        super().append(item)
+
+
+def _write_entries(f, entries):
+    if isinstance(entries, ReportSpool):
+        entries.copy_to(f)
+        return
+    f.write(b",".join(orjson.dumps(item._asdict() if isinstance(item, ChangeRecord) else item) for item in entries))
+
+
 def save_full_report(iteration_reports, change_log, final_status,base_file_path="iterations/report"):
     """
     Saves full debugging report as JSON with timestamped filename.
 
+    iteration_reports / change_log may be plain lists or ReportSpools; the entries are
+    written one at a time, so the report is never built as one in-memory document.
+
     Returns: path to saved JSON report
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    t = datetime.now()
+    timestamp = f"{t.year:04d}{t.month:02d}{t.day:02d}_{t.hour:02d}{t.minute:02d}{t.second:02d}"
     file_path = f"{base_file_path}_{timestamp}.json"
 
-    data = {
-        "final_status": final_status,
-        "total_iterations": len(iteration_reports),
-        "iterations": iteration_reports,
-        "changes": change_log
-    }
-
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    # compact JSON object {"final_status", "total_iterations", "iterations", "changes"}
+    with open(file_path, "wb") as f:
+        f.write(b'{"final_status":%s,"total_iterations":%d,"iterations":['
+                % (orjson.dumps(final_status), len(iteration_reports)))
+        _write_entries(f, iteration_reports)
+        f.write(b'],"changes":[')
+        _write_entries(f, change_log)
+        f.write(b"]}")
 
     print(f"[REPORT] Saved iteration report to: {file_path}")
     return file_path
@@ -0,0 +1,118 @@
+# runtime/_sandbox_worker.py
+"""
+Long-lived Python sandbox used by sandbox_runner.run_python on POSIX.
+
+Pooled by sandbox_runner (utils/worker_pool.py) and kept alive, so the
+interpreter start-up cost is paid once instead of per run_in_sandbox call.
+
+Protocol (one JSON object per line):
+    request  (stdin):  {"code": str, "timeout": float}
+    response (stdout): {"stdout": str, "stderr": str}  or  {"timeout": true}
+
+Each request runs in a forked child that behaves like `python -` fed the code
+on stdin (the one-shot fallback in sandbox_runner): the code executes as a fresh
+__main__ module from "<stdin>", uncaught exceptions print the usual traceback
+(with source lines, which `python -` cannot show), and non-daemon threads and
+atexit handlers run before it exits.
+The child's fds 1/2 are pipes back to this process (so prints from C code and subprocesses are captured too) and its
+stdin is /dev/null, which keeps user code off the protocol stream.
+"""
+
+import os
+import sys
+
+# helpers shared with the worker's client; utils/ goes on the path for this import only
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils"))
+import worker_io  # noqa: E402
+del sys.path[0]
+
+
+_FILENAME = "<stdin>"
+
+
+def _child(code, out_w, err_w):
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(out_w, 1)
+    os.dup2(err_w, 2)
+
+    import atexit
+    import linecache
+    import threading
+    import traceback
+    import types
+
+    sys.stdin = open(0, "r", closefd=False)
+    sys.argv = ["-"]
+    sys.path[0] = ""
+    main = types.ModuleType("__main__")
+    main.__file__ = _FILENAME
+    main.__builtins__ = __builtins__
+    sys.modules["__main__"] = main
+    # the worker's own frames (and the exec() call) sit below the user's module;
+    # don't let them count against its recursion limit
+    depth = 1
+    frame = sys._getframe()
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    sys.setrecursionlimit(sys.getrecursionlimit() + depth)
+
+    # tracebacks read source lines through linecache; mtime None keeps the entry
+    # from being treated as a stale file by checkcache()
+    linecache.cache[_FILENAME] = (len(code), None, code.splitlines(True), _FILENAME)
+
+    status = 0
+    try:
+        exec(compile(code, _FILENAME, "exec"), main.__dict__)
+    except SystemExit as e:
+        status = _exit_status(e)
+    except BaseException as e:
+        # drop this frame so the traceback starts in the user's module, as under `python -`
+        e.with_traceback(e.__traceback__.tb_next)
+        if sys.excepthook is sys.__excepthook__:
+            # same report as the default hook, but the C one reads source lines
+            # from disk and so would skip the linecache entry above
+            traceback.print_exception(type(e), e, e.__traceback__)
+        else:
+            sys.excepthook(type(e), e, e.__traceback__)
+        status = 1
+
+    # interpreter shutdown: join non-daemon threads, then atexit handlers
+    try:
+        threading._shutdown()
+        atexit._run_exitfuncs()
+    except SystemExit as e:
+        status = _exit_status(e)
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    os._exit(status)
+
+
+def _exit_status(e: SystemExit) -> int:
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    # sys.exit("message"): the interpreter prints the message and exits 1
+    try:
+        print(e.code, file=sys.stderr)
+    except Exception:
+        pass
+    return 1
+
+
+def _run_request(req) -> bytes:
+    """Run one request in a forked child; returns the encoded response object."""
+    code = req.get("code", "")
+    out = worker_io.run_forked(lambda out_w, err_w: _child(code, out_w, err_w), 2, float(req.get("timeout", 5.0)))
+    if out is None:
+        return b'{"timeout":true}'
+    return worker_io.dumps({"stdout": worker_io.decode_output(out[0]), "stderr": worker_io.decode_output(out[1])})
+
+
+if __name__ == "__main__":
+    worker_io.serve(_run_request)
@@ -3,14 +3,50 @@
 Multi-Language Sandbox Runner for Python / JS / Java
 """
 
+import atexit
+import functools
+import hashlib
+import logging
+import select
+import signal
 import subprocess
-import tempfile
+import threading
+import time
 import os
 import sys
-import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from utils.worker_io import decode_output
+from utils.worker_pool import WorkerPool
+
+# tempfile and shutil are only needed for Java (scratch folders); they are
+# imported on first use so Python/JS-only processes never load them.
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 5.0
 
+# One scratch directory per process (Java build/run folders), created on first use
+# and removed at exit. Python and JS sources never touch disk: they are streamed to
+# the interpreter's stdin (`python -` / `node -`) or sent to the Python worker.
+_SCRATCH = None
+_SCRATCH_LOCK = threading.Lock()
+
+
+def _scratch_dir() -> str:
+    global _SCRATCH
+    if _SCRATCH is None:
+        import shutil
+        import tempfile
+
+        with _SCRATCH_LOCK:
+            if _SCRATCH is None:
+                _SCRATCH = tempfile.mkdtemp(prefix="sbx_")
+                atexit.register(shutil.rmtree, _SCRATCH, True)
+    return _SCRATCH
+
 
 def run_in_sandbox(code: str, language: str = "python", timeout: float = DEFAULT_TIMEOUT):
     lang = (language or "python").lower()
@@ -25,85 +61,342 @@ def run_in_sandbox(code: str, language: str = "python", timeout: float = DEFAULT
     return "", f"Unsupported language: {language}"
 
 
+# Pool behind run_in_sandbox_batch, created on first use and kept for later batches.
+_BATCH_EXEC = None
+_BATCH_LOCK = threading.Lock()
+
+
+def _batch_executor() -> ThreadPoolExecutor:
+    global _BATCH_EXEC
+    if _BATCH_EXEC is None:
+        with _BATCH_LOCK:
+            if _BATCH_EXEC is None:
+                _BATCH_EXEC = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="sandbox-batch")
+    return _BATCH_EXEC
+
+
+def run_in_sandbox_batch(items: List[Tuple[str, str, float]]) -> List[Tuple[str, str]]:
+    """
+    Run independent (code, language, timeout) jobs concurrently and return their
+    (stdout, stderr) pairs in input order. Each job is a separate child process,
+    so threads suffice: they only wait on pipes while the children run.
+    """
+    if len(items) <= 1:
+        return [run_in_sandbox(code, language, timeout) for code, language, timeout in items]
+    futures = [_batch_executor().submit(run_in_sandbox, code, language, timeout) for code, language, timeout in items]
+    return [f.result() for f in futures]
+
+
+# ------------------ PROCESS ------------------
+
+@functools.lru_cache(maxsize=1)
+def _pidfd_supported() -> bool:
+    """posix_spawn + pidfd_open are usable here (Linux >= 5.3); probed once."""
+    if not (hasattr(os, "posix_spawnp") and hasattr(os, "pidfd_open") and hasattr(signal, "pidfd_send_signal")):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    return True
+
+
+def _capture(argv, timeout, cwd=None, input=None):
+    """
+    Run argv to completion and return (stdout, stderr) as text, like
+    subprocess.run(capture_output=True, text=True, input=input); raises
+    subprocess.TimeoutExpired after killing the child when it outlives `timeout`.
+
+    Output is drained from raw pipe fds by one poll() loop into byte chunks and
+    decoded once at the end, with no buffered/text stream layers in between.
+    On Linux the child is started with posix_spawn (vfork+exec, no page-table copy)
+    and waited for through a pidfd in the same poll(), so there is one wakeup per
+    event and an exact timeout. Runs that need a cwd (posix_spawn cannot set one)
+    are started with Popen on the same pipes; platforms without poll() use
+    subprocess.run.
+    """
+    if not hasattr(select, "poll"):
+        p = subprocess.run(argv, capture_output=True, text=True, timeout=timeout, cwd=cwd, input=input)
+        return p.stdout, p.stderr
+
+    use_pidfd = _pidfd_supported()
+    r_out, w_out = os.pipe()
+    r_err, w_err = os.pipe()
+    r_in, w_in = os.pipe() if input is not None else (None, None)
+    proc = None
+    try:
+        if cwd is None and use_pidfd:
+            actions = [(os.POSIX_SPAWN_DUP2, w_out, 1), (os.POSIX_SPAWN_DUP2, w_err, 2)]
+            if r_in is not None:
+                actions.append((os.POSIX_SPAWN_DUP2, r_in, 0))
+            pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=actions)
+        else:
+            proc = subprocess.Popen(argv, stdin=r_in, stdout=w_out, stderr=w_err, cwd=cwd)
+            pid = proc.pid
+    except BaseException:
+        for fd in (r_out, w_out, r_err, w_err, r_in, w_in):
+            if fd is not None:
+                os.close(fd)
+        raise
+    os.close(w_out)
+    os.close(w_err)
+    pidfd = os.pidfd_open(pid) if use_pidfd else None
+
+    chunks = {r_out: [], r_err: []}
+    poller = select.poll()
+    open_fds = {r_out, r_err}
+    if pidfd is not None:
+        open_fds.add(pidfd)
+    for fd in open_fds:
+        poller.register(fd, select.POLLIN)
+    # the source is fed through the poll loop as well, so a child that writes
+    # before it has read all of stdin can never deadlock against us
+    pending = memoryview(input.encode("utf-8")) if input is not None else None
+    if pending is not None:
+        os.close(r_in)
+        os.set_blocking(w_in, False)
+        poller.register(w_in, select.POLLOUT)
+        open_fds.add(w_in)
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    try:
+        # like communicate(): done once both pipes hit EOF and the child has exited
+        while open_fds:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for fd, _ in poller.poll(remaining * 1000):
+                if fd == w_in:
+                    try:
+                        pending = pending[os.write(fd, pending[:65536]):]
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        pending = pending[:0]
+                    if not pending:
+                        poller.unregister(fd)
+                        open_fds.discard(fd)
+                        os.close(fd)
+                    continue
+                if fd == pidfd:
+                    poller.unregister(fd)
+                    open_fds.discard(fd)
+                    continue
+                chunk = os.read(fd, 65536)
+                if chunk:
+                    chunks[fd].append(chunk)
+                else:
+                    poller.unregister(fd)
+                    open_fds.discard(fd)
+        if not timed_out and pidfd is None:
+            # no pidfd: the pipes are closed, wait for the exit until the deadline
+            try:
+                proc.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+        if timed_out:
+            try:
+                if pidfd is not None:
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                else:
+                    proc.kill()
+            except ProcessLookupError:
+                pass
+    finally:
+        if proc is not None:
+            proc.wait()
+        else:
+            os.waitpid(pid, 0)
+        for fd in (r_out, r_err, pidfd):
+            if fd is not None:
+                os.close(fd)
+        if w_in is not None and w_in in open_fds:
+            os.close(w_in)
+
+    if timed_out:
+        raise subprocess.TimeoutExpired(argv, timeout)
+    return decode_output(b"".join(chunks[r_out])), decode_output(b"".join(chunks[r_err]))
+
+
 # ------------------ PYTHON ------------------
 
+_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_sandbox_worker.py")
+# extra time allowed for the worker to fork/report on top of the run timeout
+_WORKER_GRACE = 2.0
+
+
+# Long-lived sandbox interpreters (runtime/_sandbox_worker.py), one per core. Each
+# forks a fresh child per request, so runs never share state; only the interpreter
+# start-up is amortized.
+_WORKERS = WorkerPool(lambda: [sys.executable, _WORKER_PATH])
+
+
 def run_python(code, timeout):
-    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
-        f.write(code)
-        path = f.name
+    # POSIX: a pooled persistent worker (needs fork); else one process per run
+    if hasattr(os, "fork"):
+        try:
+            with _WORKERS.worker() as worker:
+                resp = worker.roundtrip({"code": code, "timeout": timeout}, timeout + _WORKER_GRACE)
+            if resp is None or resp.get("timeout"):
+                return "", "TIMEOUT"
+            if "error" not in resp:
+                return resp["stdout"], resp["stderr"]
+            logger.debug("run_python: sandbox worker error (%s); falling back", resp["error"])
+        except Exception as e:
+            logger.debug("run_python: sandbox worker failed (%s); falling back", e)
 
+    # no -I: the temp-file runner this replaced honoured PYTHON* variables and put
+    # "" on sys.path, and the worker emulates the same plain `python -`
     try:
-        p = subprocess.run(
-            [sys.executable, path],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return p.stdout, p.stderr
+        return _capture([sys.executable, "-"], timeout, input=code)
     except subprocess.TimeoutExpired:
         return "", "TIMEOUT"
-    finally:
-        os.unlink(path)
 
 
 # ------------------ JAVASCRIPT ------------------
 
 def run_js(code, timeout):
-    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as f:
-        f.write(code)
-        path = f.name
-
     try:
-        p = subprocess.run(
-            ["node", path],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return p.stdout, p.stderr
+        return _capture(["node", "-"], timeout, input=code)
     except subprocess.TimeoutExpired:
         return "", "TIMEOUT"
-    finally:
-        os.unlink(path)
 
 
 # ------------------ JAVA ------------------
 
-def run_java(code, timeout):
-    folder = tempfile.mkdtemp()
-    src_file = os.path.join(folder, "Main.java")
+# Compiled classes by source digest: the repair loop re-runs the same source (and
+# the API re-runs unchanged code), and javac is a full JVM start of its own.
+# Only successful compiles are kept; the oldest folder is dropped past the cap.
+_JAVA_CLASSES = OrderedDict()
+_JAVA_CLASSES_MAX = 32
+_JAVA_CLASSES_LOCK = threading.Lock()
+# Class folders pinned by running `java` processes (folder -> number of runs).
+# An evicted folder that is still pinned is only deleted by its last release.
+_JAVA_IN_USE = {}
+_JAVA_EVICTED = set()
+
+# Per-thread build and run folders, reused across calls instead of mkdtemp+rmtree
+# each time; both live in the scratch dir and go away with it at exit.
+_JAVA_LOCAL = threading.local()
+
+
+def _java_dir(kind: str) -> str:
+    folder = getattr(_JAVA_LOCAL, kind, None)
+    if folder is None:
+        import tempfile
+
+        folder = tempfile.mkdtemp(prefix=f"java{kind}_", dir=_scratch_dir())
+        setattr(_JAVA_LOCAL, kind, folder)
+    return folder
+
+
+def _clear_dir(folder: str, suffix: str = "") -> None:
+    """Remove the entries of `folder` whose name ends with `suffix` (all of them by default)."""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                import shutil
+
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+
+def _pin_java_classes(folder: str) -> str:
+    # caller holds _JAVA_CLASSES_LOCK
+    _JAVA_IN_USE[folder] = _JAVA_IN_USE.get(folder, 0) + 1
+    return folder
+
+
+def _release_java_classes(folder: str) -> None:
+    with _JAVA_CLASSES_LOCK:
+        refs = _JAVA_IN_USE.pop(folder) - 1
+        if refs:
+            _JAVA_IN_USE[folder] = refs
+            return
+        if folder not in _JAVA_EVICTED:
+            return
+        _JAVA_EVICTED.discard(folder)
+    import shutil
+
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def _compile_java(code, timeout):
+    """
+    Return (class folder, None) for `code`, compiling on a cache miss, or
+    (None, (stdout, stderr)). The folder is pinned against eviction until the
+    caller passes it to _release_java_classes.
+    """
+    digest = hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    with _JAVA_CLASSES_LOCK:
+        folder = _JAVA_CLASSES.get(digest)
+        if folder is not None:
+            _JAVA_CLASSES.move_to_end(digest)
+            return _pin_java_classes(folder), None
+
+    # compile in this thread's build folder; classes a failed or timed-out javac
+    # left behind are dropped first
+    build = _java_dir("build")
+    _clear_dir(build, ".class")
+    src_file = os.path.join(build, "Main.java")
 
     with open(src_file, "w") as f:
         f.write(code)
 
-    # Compile
     try:
-        compile_proc = subprocess.run(
-            ["javac", src_file],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd=folder,
-        )
+        # javac itself is short-lived: C1 only starts it faster
+        _, compile_err = _capture(["javac", "-J-XX:TieredStopAtLevel=1", src_file], timeout, cwd=build)
     except subprocess.TimeoutExpired:
-        shutil.rmtree(folder)
-        return "", "TIMEOUT"
+        return None, ("", "TIMEOUT")
+
+    if compile_err:
+        return None, ("", compile_err)
+
+    stale = []
+    with _JAVA_CLASSES_LOCK:
+        if digest in _JAVA_CLASSES:
+            # another thread compiled the same source meanwhile; keep our build folder
+            folder = _JAVA_CLASSES[digest]
+        else:
+            # the build folder becomes the cache entry; the next miss makes a new one
+            folder = f"{build}_{digest}"
+            os.rename(build, folder)
+            _JAVA_LOCAL.build = None
+            _JAVA_CLASSES[digest] = folder
+            while len(_JAVA_CLASSES) > _JAVA_CLASSES_MAX:
+                old = _JAVA_CLASSES.popitem(last=False)[1]
+                if old in _JAVA_IN_USE:
+                    _JAVA_EVICTED.add(old)
+                else:
+                    stale.append(old)
+        _pin_java_classes(folder)
+    if stale:
+        import shutil
 
-    if compile_proc.stderr:
-        shutil.rmtree(folder)
-        return "", compile_proc.stderr
+        for old in stale:
+            shutil.rmtree(old, ignore_errors=True)
+    return folder, None
+
+
+def run_java(code, timeout):
+    classes, failed = _compile_java(code, timeout)
+    if failed is not None:
+        return failed
 
-    # Run
+    # Run from this thread's emptied working directory, so files a run writes never
+    # leak into the cached classes or into the next run
     try:
-        run_proc = subprocess.run(
-            ["java", "-cp", folder, "Main"],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd=folder,
-        )
-        return run_proc.stdout, run_proc.stderr
+        workdir = _java_dir("run")
+        _clear_dir(workdir)
+        return _capture(["java", "-cp", classes, "Main"], timeout, cwd=workdir)
     except subprocess.TimeoutExpired:
         return "", "TIMEOUT"
     finally:
-        shutil.rmtree(folder)
+        _release_java_classes(classes)
@@ -0,0 +1,38 @@
+# tests/test_iteration_controller.py
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+from iterations import iteration_controller as ic
+
+
+class AdvisoryIssueRoutingTest(unittest.TestCase):
+    def test_advisory_issues_do_not_block(self):
+        issues = [
+            {"issue_type": "OFF_BY_ONE_INDEX"}, {"issue_type": "SHADOW_BUILTIN"}, {"issue_type": "MUTABLE_DEFAULT_ARG"},
+        ]
+        self.assertEqual(ic._blocking_issues(issues), [{"issue_type": "MUTABLE_DEFAULT_ARG"}])
+
+    def test_correct_loop_is_left_alone(self):
+        # flagged OFF_BY_ONE_INDEX and SHADOW_BUILTIN, but it runs fine: no LLM rewrite
+        code = "list = [1, 2, 3, 4]\nfor i in range(3):\n    print(list[i + 1])\n"
+        repair_log = logging.getLogger("repair_system")
+        saved_cwd, saved_disabled = os.getcwd(), repair_log.disabled
+        with tempfile.TemporaryDirectory() as folder:
+            os.makedirs(os.path.join(folder, "iterations"))
+            os.chdir(folder)
+            repair_log.disabled = True
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fixed, _ = ic.run_repair_loop(code, "")
+            finally:
+                os.chdir(saved_cwd)
+                repair_log.disabled = saved_disabled
+        self.assertEqual(fixed, code)
+
+
+if __name__ == "__main__":
+    unittest.main()
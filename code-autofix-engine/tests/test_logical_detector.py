@@ -0,0 +1,46 @@
+# tests/test_logical_detector.py
+import ast
+import unittest
+
+from fixer import logical_detector as ld
+
+
+def _issue_types(code):
+    return [i["issue_type"] for i in ld.inspect_and_test(code)["issues"]]
+
+
+class OffByOneTest(unittest.TestCase):
+    CODE = "xs = [1, 2, 3]\nfor i in range(len(xs)):\n    print(xs[i + 1])\n"
+
+    def test_plus_offset_inside_loop_is_flagged(self):
+        self.assertEqual(_issue_types(self.CODE), ["OFF_BY_ONE_INDEX"])
+
+    def test_plus_offset_outside_loop_is_not_flagged(self):
+        self.assertEqual(_issue_types("xs = [1, 2, 3]\ni = 0\nprint(xs[i + 1])\n"), [])
+
+    def test_detectors_agree(self):
+        tree = ast.parse(self.CODE)
+        found = ld.detect_off_by_one_index_usage(tree, self.CODE)
+        self.assertEqual([i["location"] for i in found], [(3, 10)])
+        self.assertEqual(ld._run_static_detectors(tree, self.CODE), found)
+
+
+class ShadowBuiltinTest(unittest.TestCase):
+    def test_builtin_name_is_flagged(self):
+        self.assertEqual(_issue_types("id = 5\nprint(id)\n"), ["SHADOW_BUILTIN"])
+        self.assertEqual(_issue_types("list = [1]\n"), ["SHADOW_BUILTIN"])
+
+    def test_dict_method_names_are_not_flagged(self):
+        # what dir(__builtins__) used to yield inside an imported module
+        self.assertEqual(_issue_types("keys = 1\nprint(keys)\n"), [])
+
+
+class IssueTest(unittest.TestCase):
+    def test_slotted_value_object(self):
+        issue = ld.Issue("X", "msg", location=(1, 0))
+        self.assertFalse(hasattr(issue, "__dict__"))
+        self.assertEqual(issue, ld.Issue("X", "msg", location=(1, 0)))
+        self.assertNotIn("suggested_patch", issue.to_dict())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# tests/test_regex_engine.py
+import importlib
+import re
+import sys
+import types
+import unittest
+
+import utils.regex_engine as regex_engine
+
+
+class _FakeRe2(types.ModuleType):
+    """Stands in for google-re2: records what it was asked to compile."""
+
+    def __init__(self):
+        super().__init__("re2")
+        self.compiled = []
+
+    def compile(self, pattern):
+        self.compiled.append(pattern)
+        return ("re2", pattern)
+
+
+class CompilePatternTest(unittest.TestCase):
+    def setUp(self):
+        self.fake = _FakeRe2()
+        self._saved = sys.modules.get("re2")
+        sys.modules["re2"] = self.fake
+        importlib.reload(regex_engine)
+
+    def tearDown(self):
+        if self._saved is None:
+            sys.modules.pop("re2", None)
+        else:
+            sys.modules["re2"] = self._saved
+        importlib.reload(regex_engine)
+
+    def test_unicode_classes_stay_on_re(self):
+        for pattern in (r"(\w+)\s*=\s*$", r"\bx\b", r"\d+", r"[^\S\n]"):
+            self.assertIsInstance(regex_engine.compile_pattern(pattern), re.Pattern, pattern)
+        self.assertEqual(self.fake.compiled, [])
+
+    def test_ascii_only_patterns_use_re2(self):
+        for pattern in (r"[()\[\]{}]", r",[ ]*,", r"\\w"):
+            self.assertEqual(regex_engine.compile_pattern(pattern), ("re2", pattern))
+
+    def test_re2_failure_falls_back(self):
+        self.fake.compile = lambda pattern: (_ for _ in ()).throw(ValueError(pattern))
+        self.assertIsInstance(regex_engine.compile_pattern(r"(a)\1"), re.Pattern)
+
+
+class AstFixerPatternTest(unittest.TestCase):
+    def test_non_ascii_broken_assignment(self):
+        from fixer import ast_fixer
+
+        m = ast_fixer._BROKEN_ASSIGN_RE.search("n\u00e1 =  ")
+        self.assertIsNotNone(m)
+        self.assertEqual(m.group(1), "n\u00e1")
+
+
+if __name__ == "__main__":
+    unittest.main()
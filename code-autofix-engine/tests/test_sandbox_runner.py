@@ -0,0 +1,125 @@
+# tests/test_sandbox_runner.py
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from runtime import sandbox_runner as sr
+
+
+class CaptureTest(unittest.TestCase):
+    def test_stdout_and_stderr(self):
+        out, err = sr._capture([sys.executable, "-c", "import sys; print('a'); print('b', file=sys.stderr)"], 5.0)
+        self.assertEqual((out, err), ("a\n", "b\n"))
+
+    def test_universal_newlines(self):
+        out, _ = sr._capture([sys.executable, "-c", "import sys; sys.stdout.write('a\\r\\nb\\rc')"], 5.0)
+        self.assertEqual(out, "a\nb\nc")
+
+    def test_large_input_does_not_deadlock(self):
+        # the child echoes while we are still writing, well past the pipe buffer
+        data = "x" * (1 << 20)
+        out, _ = sr._capture([sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"], 10.0, input=data)
+        self.assertEqual(len(out), len(data))
+
+    def test_timeout_raises(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            sr._capture([sys.executable, "-c", "import time; time.sleep(10)"], 0.3)
+
+    def test_cwd(self):
+        with tempfile.TemporaryDirectory() as folder:
+            out, _ = sr._capture([sys.executable, "-c", "import os; print(os.getcwd())"], 5.0, cwd=folder)
+            self.assertEqual(os.path.realpath(out.strip()), os.path.realpath(folder))
+
+
+class RunPythonTest(unittest.TestCase):
+    def test_output_and_traceback(self):
+        out, err = sr.run_python("print('hi')\n1/0\n", 5.0)
+        self.assertEqual(out, "hi\n")
+        self.assertIn('File "<stdin>", line 2', err)
+        self.assertIn("ZeroDivisionError", err)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "the worker pool needs fork")
+    def test_traceback_shows_source_lines(self):
+        _, err = sr.run_python("def f():\n    return 1 / 0\nf()\n", 5.0)
+        self.assertIn('line 2, in f\n    return 1 / 0\n', err)
+
+    def test_timeout(self):
+        self.assertEqual(sr.run_python("while True: pass", 0.3), ("", "TIMEOUT"))
+
+    def test_runs_do_not_share_state(self):
+        sr.run_python("import builtins; builtins.leak = 1", 5.0)
+        self.assertIn("NameError", sr.run_python("leak", 5.0)[1])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "the worker pool needs fork")
+    def test_threads_do_not_add_workers(self):
+        for _ in range(8):
+            t = threading.Thread(target=sr.run_python, args=("print(1)", 5.0))
+            t.start()
+            t.join()
+        self.assertLessEqual(len(sr._WORKERS._workers), sr._WORKERS.size)
+        self.assertEqual(len(sr._WORKERS._workers), 1)
+
+
+# stand-ins for the JDK: javac "compiles" by copying the source to Main.class,
+# java prints that file after sleeping for the number of seconds it contains
+_FAKE_JAVAC = """#!/bin/sh
+cp "$2" "$(dirname "$2")/Main.class"
+"""
+_FAKE_JAVA = """#!/bin/sh
+sleep "$(cat "$2/Main.class")"
+cat "$2/Main.class"
+"""
+
+
+@unittest.skipUnless(os.name == "posix", "fake JDK is a shell script")
+class JavaClassCacheTest(unittest.TestCase):
+    def setUp(self):
+        bin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bin_dir, True)
+        for name, script in (("javac", _FAKE_JAVAC), ("java", _FAKE_JAVA)):
+            path = os.path.join(bin_dir, name)
+            with open(path, "w") as f:
+                f.write(script)
+            os.chmod(path, 0o755)
+        saved = os.environ["PATH"], sr._JAVA_CLASSES_MAX
+        os.environ["PATH"] = bin_dir + os.pathsep + saved[0]
+        sr._JAVA_CLASSES_MAX = 1
+        self.addCleanup(self._restore, saved)
+
+    def _restore(self, saved):
+        os.environ["PATH"], sr._JAVA_CLASSES_MAX = saved
+        with sr._JAVA_CLASSES_LOCK:
+            sr._JAVA_CLASSES.clear()
+
+    def test_cached_classes_are_reused(self):
+        self.assertEqual(sr.run_java("0", 5.0), ("0", ""))
+        folder = next(iter(sr._JAVA_CLASSES.values()))
+        self.assertEqual(sr.run_java("0", 5.0), ("0", ""))
+        self.assertEqual(list(sr._JAVA_CLASSES.values()), [folder])
+        self.assertEqual(sr._JAVA_IN_USE, {})
+
+    def test_eviction_waits_for_running_java(self):
+        result = []
+        slow = threading.Thread(target=lambda: result.append(sr.run_java("0.5", 5.0)))
+        slow.start()
+        while not sr._JAVA_IN_USE:
+            time.sleep(0.01)
+        pinned = next(iter(sr._JAVA_IN_USE))
+        # a second source evicts the running one's folder (cache size 1)
+        self.assertEqual(sr.run_java("0", 5.0), ("0", ""))
+        self.assertNotIn(pinned, sr._JAVA_CLASSES.values())
+        self.assertTrue(os.path.isdir(pinned))
+        slow.join()
+        self.assertEqual(result, [("0.5", "")])
+        self.assertFalse(os.path.exists(pinned))
+        self.assertEqual(sr._JAVA_IN_USE, {})
+        self.assertEqual(sr._JAVA_EVICTED, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
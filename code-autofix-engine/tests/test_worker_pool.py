@@ -0,0 +1,144 @@
+# tests/test_worker_pool.py
+import os
+import signal
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+
+from utils import worker_io
+from utils.worker_pool import WorkerPool
+
+# answers {"pid": ..., "echo": ...} after sleeping req["sleep"] seconds
+_ECHO_WORKER = textwrap.dedent("""
+    import os, sys, time
+    sys.path.insert(0, %r)
+    import worker_io
+
+    def handle(req):
+        time.sleep(req.get("sleep", 0))
+        return worker_io.dumps({"pid": os.getpid(), "echo": req.get("echo")})
+
+    worker_io.serve(handle)
+""") % os.path.dirname(os.path.abspath(worker_io.__file__))
+
+
+class WorkerPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        fd, cls.script = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(fd, "w") as f:
+            f.write(_ECHO_WORKER)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.script)
+
+    def _pool(self, size):
+        pool = WorkerPool(lambda: [sys.executable, self.script], size=size)
+        self.addCleanup(pool.close)
+        return pool
+
+    def _call(self, pool, req, budget=5.0):
+        with pool.worker() as worker:
+            return worker.roundtrip(req, budget)
+
+    def test_roundtrip_reuses_the_process(self):
+        pool = self._pool(1)
+        first = self._call(pool, {"echo": "a"})
+        second = self._call(pool, {"echo": "b"})
+        self.assertEqual(first["echo"], "a")
+        self.assertEqual(second["echo"], "b")
+        self.assertEqual(first["pid"], second["pid"])
+
+    def test_short_lived_threads_share_workers(self):
+        pool = self._pool(2)
+        pids = set()
+        for _ in range(10):
+            t = threading.Thread(target=lambda: pids.add(self._call(pool, {})["pid"]))
+            t.start()
+            t.join()
+        self.assertEqual(len(pids), 1)
+        self.assertEqual(len(pool._workers), 1)
+
+    def test_concurrent_callers_are_capped_at_size(self):
+        pool = self._pool(2)
+        pids = []
+        threads = [threading.Thread(target=lambda: pids.append(self._call(pool, {"sleep": 0.2})["pid"])) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(pids), 6)
+        self.assertEqual(len(set(pids)), 2)
+        self.assertEqual(len(pool._workers), 2)
+
+    def test_dead_worker_is_respawned(self):
+        pool = self._pool(1)
+        pid = self._call(pool, {})["pid"]
+        os.kill(pid, signal.SIGKILL)
+        time.sleep(0.1)
+        self.assertNotEqual(self._call(pool, {})["pid"], pid)
+
+    def test_unresponsive_worker_is_killed(self):
+        pool = self._pool(1)
+        start = time.monotonic()
+        self.assertIsNone(self._call(pool, {"sleep": 10}, budget=0.3))
+        self.assertLess(time.monotonic() - start, 3.0)
+        self.assertIsNone(pool._workers[0].proc)
+        self.assertEqual(self._call(pool, {"echo": 1})["echo"], 1)
+
+    def test_failing_block_closes_worker_and_returns_it(self):
+        pool = self._pool(1)
+        with self.assertRaises(RuntimeError):
+            with pool.worker() as worker:
+                worker.roundtrip({}, 5.0)
+                raise RuntimeError("boom")
+        self.assertIsNone(worker.proc)
+        with pool.worker() as again:
+            self.assertIs(again, worker)
+
+    def test_handler_error_is_reported(self):
+        pool = self._pool(1)
+        self.assertIn("error", self._call(pool, {"sleep": "x"}))
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+class RunForkedTest(unittest.TestCase):
+    def test_collects_each_pipe(self):
+        def child(a, b):
+            os.write(a, b"out")
+            os.write(b, b"err")
+            os._exit(0)
+
+        self.assertEqual(worker_io.run_forked(child, 2, 5.0), [b"out", b"err"])
+
+    def test_timeout_kills_child(self):
+        def child(w):
+            os.write(w, b"partial")
+            time.sleep(10)
+            os._exit(0)
+
+        start = time.monotonic()
+        self.assertIsNone(worker_io.run_forked(child, 1, 0.3))
+        self.assertLess(time.monotonic() - start, 3.0)
+
+    def test_waits_for_exit_without_pidfd(self):
+        saved = worker_io._pidfd_open
+        worker_io._pidfd_open = lambda pid: None
+        try:
+            def child(w):
+                os.close(w)
+                time.sleep(10)
+                os._exit(0)
+
+            self.assertIsNone(worker_io.run_forked(child, 1, 0.3))
+            self.assertEqual(worker_io.run_forked(lambda w: os._exit(0), 1, 5.0), [b""])
+        finally:
+            worker_io._pidfd_open = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,24 +11,53 @@ logger = logging.getLogger(__name__)
 SANDBOX_FILE_PATH = "runtime/sandbox/user_code.py"
 OUTPUT_DIR = "runtime/output"
 
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Directories already created this process; makedirs(exist_ok=True) still costs a
+# mkdir syscall each call. A directory removed later is recreated on the failed open.
+_DIRS_ENSURED = set()
+
+
+def _ensure_dir(d: str):
+    if d not in _DIRS_ENSURED:
+        os.makedirs(d, exist_ok=True)
+        _DIRS_ENSURED.add(d)
+
+
+def _write_bytes(path: str, text: str):
+    """Write text as UTF-8 straight to an fd: one encode, no TextIOWrapper buffering."""
+    data = memoryview(text.encode("utf-8"))
+    try:
+        fd = os.open(path, _WRITE_FLAGS, 0o644)
+    except FileNotFoundError:
+        d = os.path.dirname(path)
+        if d not in _DIRS_ENSURED:
+            raise
+        _DIRS_ENSURED.discard(d)
+        _ensure_dir(d)
+        fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
 
 def write_sandbox_file(code: str, path: str = None):
     """Writes user code to sandbox file."""
     path = path or SANDBOX_FILE_PATH
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(code)
-    logger.debug(f"Written sandbox code to {path}")
+    _ensure_dir(os.path.dirname(path))
+    _write_bytes(path, code)
+    logger.debug("Written sandbox code to %s", path)
     return path
 
 
 def write_output_file(content: str, filename: str):
     """Writes content to output directory."""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    _ensure_dir(OUTPUT_DIR)
     path = os.path.join(OUTPUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-    logger.debug(f"Saved {filename} to {OUTPUT_DIR}")
+    _write_bytes(path, content)
+    logger.debug("Saved %s to %s", filename, OUTPUT_DIR)
     return path
 
 
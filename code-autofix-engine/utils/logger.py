@@ -6,6 +6,10 @@ Centralized logging utilities for the repair system.
 import logging
 import sys
 
+# log_step/log_header logger, set up on first use; the flag skips the handler check afterwards
+_LOG = logging.getLogger("repair_system")
+_INITIALIZED = False
+
 
 def setup_logger(name: str = "repair_system", level=logging.DEBUG):
     """Sets up a global logger with console output."""
@@ -26,12 +30,18 @@ def setup_logger(name: str = "repair_system", level=logging.DEBUG):
     return logger
 
 
+def _ensure_logger():
+    global _INITIALIZED
+    if not _LOG.handlers:
+        setup_logger()
+    _INITIALIZED = True
+
+
 def log_step(message: str):
     """Standard log line for iteration steps."""
-    logger = logging.getLogger("repair_system")
-    if not logger.handlers:
-        setup_logger()
-    logger.info(message)
+    if not _INITIALIZED:
+        _ensure_logger()
+    _LOG.info(message)
 
 
 def log_header(title: str = ""):
@@ -40,14 +50,12 @@ def log_header(title: str = ""):
     Example:
         log_header("=== Starting Repair Loop ===")
     """
-    logger = logging.getLogger("repair_system")
-    if not logger.handlers:
-        setup_logger()
+    if not _INITIALIZED:
+        _ensure_logger()
 
+    # one record: the handler formats, locks and writes once
     bar = "=" * len(title) if title else "=" * 50
-    logger.info(f"\n{bar}")
     if title:
-        logger.info(title)
-        logger.info(bar)
+        _LOG.info(f"\n{bar}\n{title}\n{bar}")
     else:
-        logger.info(bar)
+        _LOG.info(f"\n{bar}\n{bar}")
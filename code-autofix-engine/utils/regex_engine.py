@@ -0,0 +1,40 @@
+"""
+Regex engine selection for hot-path patterns.
+
+Uses Google RE2 (linear-time DFA matching) when the optional `google-re2`
+binding is installed, and falls back to the stdlib `re` module otherwise.
+
+The two engines only agree on what a pattern matches if it avoids the places
+where their syntax means different things:
+- RE2's \\w, \\s, \\d and \\b are ASCII-only, while `re` matches Unicode for
+  them on str patterns, so patterns using those escapes are always compiled
+  with `re` (a broken assignment to a non-ASCII name must be repaired
+  whichever engine is installed);
+- patterns RE2 cannot express (backreferences, lookarounds) also fall back
+  to `re` individually;
+- RE2's "$" does not match before a final "\\n": write the newline explicitly.
+Within those rules callers get the same matches from either engine.
+"""
+
+import re
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# an unescaped \w \W \s \S \d \D \b \B (not one whose backslash is itself escaped)
+_UNICODE_CLASS_RE = re.compile(r"(?<!\\)(?:\\\\)*\\[wWsSdDbB]")
+
+
+def compile_pattern(pattern: str):
+    """
+    Compile `pattern` with RE2 if available and safe, else with `re`.
+    Pass flags inline (e.g. "(?s)") so both engines read them the same way.
+    """
+    if re2 is not None and not _UNICODE_CLASS_RE.search(pattern):
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            pass
+    return re.compile(pattern)
@@ -1,27 +1,32 @@
-# utils/timers.py
 """
 Timing utilities for execution measurement.
 """
 
-import time
+from time import perf_counter_ns as _pcn
 from contextlib import contextmanager
 
+# bound once so a timed call does no global lookup for the sink
+_PRINT = print
+
+
 @contextmanager
 def timer(name: str = "block"):
-    """Context manager to measure execution time."""
-    start = time.time()
+    """Context manager to measure execution time (monotonic, ns resolution)."""
+    start = _pcn()
     yield
-    end = time.time()
-    elapsed = end - start
-    print(f"[TIMER] {name}: {elapsed:.4f}s")
+    elapsed_ns = _pcn() - start
+    _PRINT(f"[TIMER] {name}: {elapsed_ns / 1e9:.4f}s")
 
 
 def measure_time(func):
     """Decorator to measure execution time of functions."""
+    # closure cells instead of globals inside the timed wrapper
+    pcn, sink, name = _pcn, _PRINT, func.__name__
+
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = pcn()
         result = func(*args, **kwargs)
-        elapsed = time.time() - start
-        print(f"[TIMER] {func.__name__}: {elapsed:.4f}s")
+        elapsed_ns = pcn() - start
+        sink(f"[TIMER] {name}: {elapsed_ns / 1e9:.4f}s")
         return result
     return wrapper
@@ -6,50 +6,72 @@ Handles:
 - Determining whether the code is successfully fixed
 """
 
+import re
+
 from errors.error_types import ErrorType
 
+# A timestamped sandbox log line (leading blanks allowed) together with its newline
+_SANDBOX_LINE_RE = re.compile(r"^[^\S\n]*\[20[^\n]*?\] \[INFO\][^\n]*\n?", re.MULTILINE)
+
+# Every stderr keyword validation looks for, found in one case-insensitive pass
+_CLASSIFY = re.compile(
+    r"(?P<synt>syntaxerror)|(?P<ind>indentationerror)|(?P<mem>memoryerror)"
+    r"|(?P<to>timeout|timed out)|(?P<warn>warning|deprecated)",
+    re.IGNORECASE,
+)
+
+# Failure messages by _CLASSIFY group, in priority order
+_FAILURES = (
+    ("synt", "SyntaxError detected."),
+    ("ind", "IndentationError detected."),
+    ("mem", "MemoryError: exceeded limit."),
+    ("to", "Execution timed out."),
+)
+
 
 def clean_stderr(stderr: str) -> str:
     """
     Remove sandbox logger lines such as:
     [2025-11-27 13:34:39] [INFO] Executing sandboxed code...
     """
-    cleaned = []
-    for line in stderr.splitlines():
-        stripped = line.strip()
+    return _SANDBOX_LINE_RE.sub("", stderr).strip()
 
-        # Ignore timestamped sandbox logs
-        if stripped.startswith("[20") and "] [INFO]" in stripped:
-            continue
 
-        cleaned.append(line)
+def _categories(cleaned: str) -> set:
+    """_CLASSIFY group names that occur anywhere in the cleaned stderr."""
+    return {m.lastgroup for m in _CLASSIFY.finditer(cleaned)}
 
-    return "\n".join(cleaned).strip()
 
+def _is_success(cleaned: str, found: set, error_type: ErrorType) -> bool:
+    # empty stderr, or only harmless warnings
+    return error_type == ErrorType.NONE and (cleaned == "" or "warn" in found)
 
-def is_success(stdout: str, stderr: str, error_type: ErrorType) -> bool:
+
+def is_success(stdout: str, stderr: str, error_type: ErrorType, cleaned: str = None) -> bool:
     """
     Determine if execution is successful.
 
     Success if:
     - error_type == NONE
     - cleaned stderr is empty or contains harmless warnings
+
+    cleaned: clean_stderr(stderr), when the caller already has it
     """
     if error_type != ErrorType.NONE:
         return False
 
-    cleaned = clean_stderr(stderr)
+    if cleaned is None:
+        # fixed code usually leaves stderr empty: no regex pass needed
+        if stderr == "" or stderr.isspace():
+            return True
+        cleaned = clean_stderr(stderr)
 
     # If cleaned stderr is empty → success
     if cleaned == "":
         return True
 
     # Allow harmless warnings
-    harmless = ["warning", "deprecated"]
-    if any(h in cleaned.lower() for h in harmless):
-        return True
-
-    return False
+    return _is_success(cleaned, _categories(cleaned), error_type)
 
 
 def validate_iteration(stdout: str, stderr: str, error_type: ErrorType):
@@ -58,25 +80,24 @@ def validate_iteration(stdout: str, stderr: str, error_type: ErrorType):
     Returns:
         (bool success, str message)
     """
-    success = is_success(stdout, stderr, error_type)
+    # hot path once the code is fixed: no error and nothing on stderr
+    if error_type == ErrorType.NONE and (stderr == "" or stderr.isspace()):
+        return True, "Execution succeeded."
 
-    if success:
+    cleaned = clean_stderr(stderr)
+    found = _categories(cleaned)
+
+    if _is_success(cleaned, found, error_type):
         return True, "Execution succeeded."
 
     # Failure categories
-    cleaned = clean_stderr(stderr).lower()
-
-    if "syntaxerror" in cleaned:
-        return False, "SyntaxError detected."
-    if "indentationerror" in cleaned:
-        return False, "IndentationError detected."
-    if "memoryerror" in cleaned:
-        return False, "MemoryError: exceeded limit."
-    if "timeout" in cleaned or "timed out" in cleaned:
-        return False, "Execution timed out."
+    for group, message in _FAILURES:
+        if group in found:
+            return False, message
 
     # If there is no stdout and no meaningful stderr
-    if not stdout.strip() and cleaned.strip() == "":
+    # (cleaned is already stripped; isspace() tests stdout without copying it)
+    if cleaned == "" and (stdout == "" or stdout.isspace()):
         return False, "Code produced no output."
 
     return False, "Errors remain."
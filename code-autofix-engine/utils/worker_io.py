@@ -0,0 +1,125 @@
+# utils/worker_io.py
+"""
+Helpers shared by the long-lived worker scripts (fixer/_runner_worker.py,
+runtime/_sandbox_worker.py) and the code that talks to them: the JSON-lines
+encoding, output decoding, the worker main loop and its fork-per-request runner.
+The client side (spawning, pooling) is utils/worker_pool.py.
+
+Stdlib-only on purpose: the worker scripts load this file by path, and the test
+worker may run under PYTHON_EXECUTABLE, an interpreter that need not have our
+requirements installed.
+"""
+
+import json
+import locale
+import os
+import select
+import signal
+import sys
+import time
+
+# orjson when the interpreter has it (it is pinned in requirements.txt), compact
+# stdlib json otherwise; both produce one line of UTF-8 bytes
+try:
+    import orjson
+
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+
+
+def decode_output(data: bytes) -> str:
+    """Captured child output as text, the way subprocess text=True produces it
+    (locale encoding, universal newlines), with undecodable bytes replaced."""
+    return data.decode(locale.getpreferredencoding(False), "replace").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def serve(handle) -> None:
+    """
+    Worker main loop: answer each JSON line on stdin with the encoded response
+    handle(request) returns, as one line on stdout. A request that raises is
+    answered with {"error": message}. Returns when stdin closes.
+    """
+    out = sys.stdout.buffer
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            resp = handle(loads(line))
+        except Exception as e:
+            resp = dumps({"error": str(e)})
+        out.write(resp + b"\n")
+        out.flush()
+
+
+def _pidfd_open(pid):
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
+
+def run_forked(child, n_pipes: int, timeout: float):
+    """
+    Fork and call child(*write_fds) in the child, which must end in os._exit.
+    Like communicate(), collects what it writes to each of the `n_pipes` pipes
+    until all of them hit EOF and the child has exited. Returns the bytes read
+    per pipe, or None (after killing the child) if that outlived `timeout`.
+    """
+    pipes = [os.pipe() for _ in range(n_pipes)]
+    pid = os.fork()
+    if pid == 0:
+        try:
+            for r, _ in pipes:
+                os.close(r)
+            child(*[w for _, w in pipes])
+        finally:
+            os._exit(1)
+    for _, w in pipes:
+        os.close(w)
+
+    pidfd = _pidfd_open(pid)
+    chunks = {r: [] for r, _ in pipes}
+    wait_fds = list(chunks) + ([pidfd] if pidfd is not None else [])
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    try:
+        while wait_fds:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select(wait_fds, [], [], remaining)
+            for fd in ready:
+                chunk = os.read(fd, 65536) if fd != pidfd else b""
+                if chunk:
+                    chunks[fd].append(chunk)
+                else:
+                    wait_fds.remove(fd)
+        # no pidfd: the pipes are closed, poll for the exit until the deadline
+        while not timed_out and pidfd is None and os.waitpid(pid, os.WNOHANG)[0] == 0:
+            if time.monotonic() >= deadline:
+                timed_out = True
+            else:
+                time.sleep(0.005)
+        if timed_out:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    finally:
+        for fd in list(chunks) + [pidfd]:
+            if fd is not None:
+                os.close(fd)
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass  # already reaped by the WNOHANG poll
+
+    if timed_out:
+        return None
+    return [b"".join(chunks[r]) for r, _ in pipes]
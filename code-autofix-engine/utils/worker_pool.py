@@ -0,0 +1,138 @@
+# utils/worker_pool.py
+"""
+Client side of the long-lived JSON-lines workers (fixer/_runner_worker.py,
+runtime/_sandbox_worker.py; protocol helpers in utils/worker_io.py).
+
+A WorkerPool owns at most `size` worker processes, one per core by default.
+Callers check a worker out for one round-trip and hand it back, so the number
+of processes stays bounded however many threads (request handlers, executors)
+come and go.
+"""
+
+import atexit
+import contextlib
+import os
+import queue
+import select
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+
+class JsonLineWorker:
+    """
+    One worker process fed one JSON request per line on stdin, answering with one
+    JSON line on stdout. The process is started on first use; a dead or
+    unresponsive one is killed and respawned on the next call.
+    """
+
+    def __init__(self, command: Callable[[], List[str]]):
+        self._command = command
+        self.proc: Optional[subprocess.Popen] = None
+        self._buf = b""
+
+    def _spawn(self) -> None:
+        # close_fds=False lets subprocess use posix_spawn; our own fds are
+        # non-inheritable (PEP 446), so nothing leaks into the worker
+        self.proc = subprocess.Popen(
+            self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, close_fds=False
+        )
+        self._buf = b""
+
+    def close(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=1.0)
+        except Exception:
+            pass
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _read_line(self, deadline: float) -> Optional[bytes]:
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\n", 1)
+        return line
+
+    def roundtrip(self, req: Dict[str, Any], budget: float) -> Optional[Dict[str, Any]]:
+        """Send one request line, wait up to `budget` seconds for the reply (None if none)."""
+        if self.proc is None or self.proc.poll() is not None:
+            self.close()
+            self._spawn()
+        try:
+            self.proc.stdin.write(orjson.dumps(req) + b"\n")
+            self.proc.stdin.flush()
+            line = self._read_line(time.monotonic() + budget)
+        except (OSError, ValueError):
+            line = None
+        if line is None:
+            # worker stuck or gone
+            self.close()
+            return None
+        return orjson.loads(line)
+
+
+class WorkerPool:
+    """
+    At most `size` JsonLineWorkers (default: one per core), created lazily and
+    handed out through a queue; when all are busy, worker() waits for one.
+    Processes are killed at interpreter exit.
+    """
+
+    def __init__(self, command: Callable[[], List[str]], size: Optional[int] = None):
+        self._command = command
+        self.size = size or os.cpu_count() or 4
+        # LIFO: the most recently used (warm, already spawned) worker goes out first
+        self._idle: "queue.LifoQueue[JsonLineWorker]" = queue.LifoQueue()
+        self._workers: List[JsonLineWorker] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _checkout(self) -> JsonLineWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = JsonLineWorker(self._command)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    @contextlib.contextmanager
+    def worker(self):
+        """Check a worker out for the `with` block; it is killed first if the block raises."""
+        worker = self._checkout()
+        try:
+            yield worker
+        except BaseException:
+            worker.close()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.close()